@@ -6,10 +6,105 @@ import { Router } from 'express';
 import { exec } from 'child_process';
 import { promisify } from 'util';
 import path from 'path';
+import axios from 'axios';
 
 const execAsync = promisify(exec);
 const router = Router();
 
+// Long-running agent service (`python agent.py --serve`)
+const AGENT_SERVICE_URL = process.env.AGENT_SERVICE_URL || 'http://127.0.0.1:8765';
+
+// Sources nike_campaigns_pipeline.py --sources accepts
+const PIPELINE_SOURCES = ['meta', 'google', 'tiktok', 'soap', 'seznam'];
+
+interface AgentResult {
+  success: boolean;
+  action: string;
+  results: any[];
+  summary: {
+    total: number;
+    sources: string[];
+    channels: string[];
+    total_budget?: number;
+    total_impressions?: number;
+  };
+  logs: string[];
+  raw_output: string;
+}
+
+/**
+ * Ask the warm agent service; resolves to null when it is not running
+ */
+async function queryAgentService(query: string): Promise<AgentResult | null> {
+  try {
+    const response = await axios.post<AgentResult>(
+      `${AGENT_SERVICE_URL}/query`,
+      { query },
+      { timeout: 120000 }
+    );
+    return response.data;
+  } catch (error) {
+    if (axios.isAxiosError(error) && !error.response) {
+      return null;
+    }
+    throw error;
+  }
+}
+
+interface PipelineEvent {
+  event: string;
+  elapsed_ms?: number;
+  source?: string;
+  [key: string]: any;
+}
+
+/**
+ * Refresh through the agent service, reading its progress events as they
+ * stream in; resolves to null when the service is not running
+ */
+async function refreshAgentService(sources: string[], fullReload: boolean): Promise<{ success: boolean; events: PipelineEvent[] } | null> {
+  let response;
+  try {
+    response = await axios.post(
+      `${AGENT_SERVICE_URL}/refresh`,
+      { sources, full_reload: fullReload },
+      { responseType: 'stream' }
+    );
+  } catch (error) {
+    if (axios.isAxiosError(error) && !error.response) {
+      return null;
+    }
+    throw error;
+  }
+
+  return new Promise((resolve, reject) => {
+    const events: PipelineEvent[] = [];
+    let buffered = '';
+
+    const handleLine = (line: string) => {
+      if (!line.trim()) return;
+      const event: PipelineEvent = JSON.parse(line);
+      events.push(event);
+      if (event.event !== 'pages_fetched') {
+        console.log(`[API] Pipeline ${event.event}${event.source ? ` (${event.source})` : ''} at ${event.elapsed_ms ?? '-'} ms`);
+      }
+    };
+
+    response.data.on('data', (chunk: Buffer) => {
+      buffered += chunk.toString('utf8');
+      const lines = buffered.split('\n');
+      buffered = lines.pop() || '';
+      lines.forEach(handleLine);
+    });
+    response.data.on('end', () => {
+      handleLine(buffered);
+      const finished = events.find((event) => event.event === 'refresh_finished');
+      resolve({ success: Boolean(finished?.success), events });
+    });
+    response.data.on('error', reject);
+  });
+}
+
 interface QueryRequest {
   query: string;
   limit?: number;
@@ -42,7 +137,22 @@ router.post('/query', async (req, res) => {
 
     console.log(`[API] Received query: ${query}`);
 
-    // Execute Python agent script
+    // Prefer the warm agent service: no interpreter start or DB connect per request
+    const agentResult = await queryAgentService(query);
+    if (agentResult) {
+      return res.json({
+        success: agentResult.success,
+        data: {
+          query,
+          summary: agentResult.summary,
+          results: agentResult.results,
+          rawOutput: [...agentResult.logs, agentResult.raw_output].join('\n'),
+        },
+        timestamp: new Date().toISOString(),
+      });
+    }
+
+    // Fallback: execute Python agent script
     const pipelinesDir = path.join(__dirname, '../../pipelines');
     const command = `cd ${pipelinesDir} && source venv/bin/activate && python agent.py "${query.replace(/"/g, '\\"')}"`;
 
@@ -111,13 +221,42 @@ router.post('/query', async (req, res) => {
 /**
  * POST /api/refresh
  * Re-run the data extraction pipeline
+ * Optional body: { sources: ['tiktok', 'seznam'] } to reload only those sources,
+ * { full_reload: true } to reload everything instead of only what changed
  */
 router.post('/refresh', async (req, res) => {
   try {
-    console.log('[API] Running data refresh...');
+    const sources: string[] = Array.isArray(req.body?.sources) ? req.body.sources : [];
+    const fullReload = req.body?.full_reload === true;
+    const unknown = sources.filter((source) => !PIPELINE_SOURCES.includes(source));
+    if (unknown.length > 0) {
+      return res.status(400).json({
+        success: false,
+        error: `Unknown source(s): ${unknown.join(', ')}`,
+      });
+    }
+
+    console.log(`[API] Running data refresh${sources.length ? ` for ${sources.join(', ')}` : ''}...`);
+
+    // Prefer the warm agent service: it runs the pipeline in-process and
+    // reports structured progress instead of stdout
+    const serviceResult = await refreshAgentService(sources, fullReload);
+    if (serviceResult) {
+      const complete = serviceResult.events.find((event) => event.event === 'pipeline_complete');
+      return res.json({
+        success: serviceResult.success,
+        message: serviceResult.success && !complete?.failed?.length
+          ? 'Data refreshed successfully'
+          : 'Pipeline completed with warnings',
+        events: serviceResult.events,
+        timestamp: new Date().toISOString(),
+      });
+    }
 
     const pipelinesDir = path.join(__dirname, '../../pipelines');
-    const command = `cd ${pipelinesDir} && source venv/bin/activate && python nike_campaigns_pipeline.py`;
+    const sourcesArg = sources.length ? ` --sources ${sources.join(',')}` : '';
+    const fullReloadArg = fullReload ? ' --full-reload' : '';
+    const command = `cd ${pipelinesDir} && source venv/bin/activate && python nike_campaigns_pipeline.py${sourcesArg}${fullReloadArg}`;
 
     const { stdout, stderr } = await execAsync(command, {
       maxBuffer: 10 * 1024 * 1024,
@@ -144,6 +283,30 @@ router.post('/refresh', async (req, res) => {
   }
 });
 
+/**
+ * Last pipeline run's per-source metrics and throughput regressions,
+ * from the file the pipeline writes after each run (pipelines/metrics.py)
+ */
+function readPipelineThroughput(pipelinesDir: string) {
+  const fs = require('fs');
+  const metricsDir = process.env.PIPELINE_METRICS_DIR || path.join(pipelinesDir, 'metrics');
+  const metricsPath = path.join(metricsDir, 'pipeline_metrics.json');
+
+  try {
+    const metrics = JSON.parse(fs.readFileSync(metricsPath, 'utf8'));
+    const lastRun = metrics.runs[metrics.runs.length - 1];
+    return {
+      lastRun: lastRun ? new Date(lastRun.finished_at * 1000).toISOString() : null,
+      durationSeconds: lastRun?.duration_s ?? null,
+      sources: lastRun?.sources ?? {},
+      regressions: metrics.regressions ?? [],
+    };
+  } catch {
+    // No run yet (or the file is being replaced)
+    return { lastRun: null, durationSeconds: null, sources: {}, regressions: [] };
+  }
+}
+
 /**
  * GET /api/status
  * Check if data is available and servers are running
@@ -191,6 +354,7 @@ router.get('/status', async (req, res) => {
       dataAvailable,
       mockServers: serverStatus,
       ready: dataAvailable && allServersRunning,
+      throughput: readPipelineThroughput(pipelinesDir),
       timestamp: new Date().toISOString(),
     });
 
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Synthetic Fixture Generator
+
+Generates large, deterministic fixtures for the mock servers:
+- google-ads/fixtures.json   Google Ads campaigns
+- tiktok-api/fixtures.json   TikTok campaigns
+- meta-api/meta-ads.json     Meta Ad Library ads
+- soap-budget/approvals.xml  Budget approvals
+
+Every source gets one record per campaign of the same synthetic campaign
+list, so record i describes the same campaign everywhere: same name, same
+dates, a budget that agrees across sources, and IDs derived from i (see
+ID_BASES, written to manifest.json). The budget approval's CampaignID is
+the shared campaign key (NIKE-0000001, ...).
+
+The same seed and count always produce the same files, and each source's
+output does not depend on which other sources are generated. Records are
+written one at a time, so 10M records need no more memory than 10k.
+
+The files go to a separate directory (default: mocks/generated/), laid out
+like mocks/; start the mocks with MOCK_FIXTURES_DIR pointing at it to load
+them instead of the bundled fixtures:
+
+    python mocks/generate_fixtures.py --records 100000
+    MOCK_FIXTURES_DIR=$PWD/mocks/generated ./start-all-mocks.sh
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+DEFAULT_RECORDS = 10_000
+DEFAULT_SEED = 42
+DEFAULT_OUTPUT_DIR = Path(__file__).parent / "generated"
+
+# Campaign start dates are spread over this range
+FIRST_START_DATE = date(2023, 1, 1)
+LAST_START_DATE = date(2025, 10, 31)
+
+# Source IDs are the base plus the campaign index
+ID_BASES = {
+    'google': 21843576928,
+    'tiktok': 1234567890123451,
+    'meta': 123456789,
+}
+
+# TikTok's mock is queried for Nike's advertiser account
+TIKTOK_ADVERTISER_ID = "1700000000000001"
+
+PRODUCT_LINES = [
+    "Air Max", "Air Jordan", "Pegasus", "Dunk", "Air Force 1", "Vaporfly",
+    "Blazer", "Metcon", "Nike By You", "ACG", "Tech Fleece", "Invincible Run",
+]
+THEMES = [
+    "Launch", "Holiday Push", "Back to School", "Marathon Season", "Summer Drop",
+    "Retro Revival", "Women's Spotlight", "Sustainability", "Member Exclusive",
+    "Flash Sale", "Just Do It", "Playoffs",
+]
+REGIONS = ["US", "EMEA", "APAC", "LATAM", "Global"]
+
+GOOGLE_CHANNELS = ["YouTube", "Google Display", "Search"]
+TIKTOK_OBJECTIVES = ["REACH", "ENGAGEMENT", "CONVERSION"]
+META_PLATFORMS = [["facebook", "instagram"], ["instagram"], ["facebook"], ["facebook", "instagram", "messenger"]]
+AGE_RANGES = ["18-24", "25-34", "35-44", "45-54", "55-64"]
+
+COST_CENTERS = ["US-MARKETING-DIGITAL", "GLOBAL-BRAND", "EMEA-MARKETING", "APAC-MARKETING"]
+APPROVERS = [
+    "Sarah Johnson", "Michael Chen", "Emily Rodriguez", "James Wilson", "Lisa Anderson",
+    "David Martinez", "Jennifer Williams", "Kevin Park", "Michelle Taylor", "Wei Zhang",
+]
+APPROVAL_NOTES = [
+    "Seasonal campaign launch", "Product launch support", "Regional brand push",
+    "Performance budget top-up", "Athlete partnership activation", "Retail traffic driver",
+]
+
+
+def iter_campaigns(count: int, seed: int) -> Iterator[Dict[str, Any]]:
+    """
+    The shared campaign list: the attributes every source agrees on
+
+    Drawn from its own random stream, so it is identical for every source.
+    """
+    rng = random.Random(seed)
+    span = (LAST_START_DATE - FIRST_START_DATE).days
+
+    for index in range(count):
+        start = FIRST_START_DATE + timedelta(days=rng.randrange(span + 1))
+        region = rng.choice(REGIONS)
+        yield {
+            'index': index,
+            'key': f"NIKE-{index + 1:07d}",
+            'name': f"{rng.choice(PRODUCT_LINES)} {rng.choice(THEMES)} {start.year} {region}",
+            'region': region,
+            'start_date': start,
+            'end_date': start + timedelta(days=rng.randint(14, 120)),
+            # Log-normal: most campaigns are small, a few are very large
+            'budget': round(min(rng.lognormvariate(13.0, 1.0), 50_000_000), -3),
+        }
+
+
+def _unix(day: date) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+
+
+def _delivery(rng: random.Random, campaign: Dict[str, Any]) -> Dict[str, Any]:
+    """Plausible spend and funnel metrics for a campaign on one platform"""
+    spend = campaign['budget'] * rng.uniform(0.3, 1.0)
+    impressions = int(spend * rng.uniform(2.0, 12.0))
+    clicks = int(impressions * rng.uniform(0.005, 0.04))
+    conversions = int(clicks * rng.uniform(0.01, 0.06))
+    return {
+        'spend': spend,
+        'impressions': impressions,
+        'clicks': clicks,
+        'conversions': conversions,
+        'conversion_value': conversions * rng.uniform(80.0, 200.0),
+    }
+
+
+def google_campaign(rng: random.Random, campaign: Dict[str, Any]) -> Dict[str, Any]:
+    delivery = _delivery(rng, campaign)
+    return {
+        "id": str(ID_BASES['google'] + campaign['index']),
+        "name": campaign['name'],
+        "status": "PAUSED" if rng.random() < 0.1 else "ENABLED",
+        "budget_micros": int(campaign['budget'] * 1_000_000),
+        "channel": rng.choice(GOOGLE_CHANNELS),
+        "start_date": campaign['start_date'].isoformat(),
+        "end_date": campaign['end_date'].isoformat(),
+        "metrics": {
+            "impressions": delivery['impressions'],
+            "clicks": delivery['clicks'],
+            "cost_micros": int(delivery['spend'] * 1_000_000),
+            "conversions": delivery['conversions'],
+            "conversion_value_micros": int(delivery['conversion_value'] * 1_000_000),
+        },
+    }
+
+
+def tiktok_campaign(rng: random.Random, campaign: Dict[str, Any]) -> Dict[str, Any]:
+    delivery = _delivery(rng, campaign)
+    objective = rng.choice(TIKTOK_OBJECTIVES)
+    start_time = _unix(campaign['start_date'])
+    end_time = _unix(campaign['end_date'])
+    create_time = start_time - rng.randint(1, 14) * 86400
+    reach = int(delivery['impressions'] / rng.uniform(1.5, 3.5))
+    return {
+        "campaign_id": str(ID_BASES['tiktok'] + campaign['index']),
+        "campaign_name": campaign['name'],
+        "advertiser_id": TIKTOK_ADVERTISER_ID,
+        "campaign_type": objective,
+        "objective": objective,
+        "budget_mode": "TOTAL_BUDGET",
+        "budget": str(int(campaign['budget'])),
+        "budget_type": "DAILY",
+        "status": "PAUSED" if rng.random() < 0.1 else "RUNNING",
+        "channel": "TikTok",
+        "create_time": create_time,
+        "modify_time": rng.randint(create_time, end_time),
+        "start_time": start_time,
+        "end_time": end_time,
+        "metrics": {
+            "spend": f"{delivery['spend']:.2f}",
+            "impressions": str(delivery['impressions']),
+            "clicks": str(delivery['clicks']),
+            "conversions": str(delivery['conversions']),
+            "conversion_rate": f"{100 * delivery['conversions'] / max(delivery['clicks'], 1):.2f}",
+            "cpc": f"{delivery['spend'] / max(delivery['clicks'], 1):.3f}",
+            "cost_per_conversion": f"{delivery['spend'] / max(delivery['conversions'], 1):.2f}",
+            "reach": str(reach),
+            "frequency": f"{delivery['impressions'] / max(reach, 1):.2f}",
+        },
+    }
+
+
+def meta_ad(rng: random.Random, campaign: Dict[str, Any]) -> Dict[str, Any]:
+    delivery = _delivery(rng, campaign)
+    first_age = rng.randrange(len(AGE_RANGES) - 1)
+    # The Ad Library only publishes ranges
+    impressions_upper = int(delivery['impressions'] * rng.uniform(1.0, 1.25))
+    spend_upper = int(delivery['spend'] * rng.uniform(1.0, 1.25))
+    return {
+        "id": str(ID_BASES['meta'] + campaign['index']),
+        "ad_creative_bodies": [f"{campaign['name']}. Shop now on Nike.com."],
+        "ad_delivery_start_time": f"{campaign['start_date'].isoformat()}T00:00:00Z",
+        "ad_delivery_stop_time": f"{campaign['end_date'].isoformat()}T00:00:00Z",
+        "page_name": "Nike",
+        "impressions": {
+            "lower_bound": str(int(impressions_upper * 0.8)),
+            "upper_bound": str(impressions_upper),
+        },
+        "spend": {
+            "lower_bound": str(int(spend_upper * 0.8)),
+            "upper_bound": str(spend_upper),
+        },
+        "currency": "USD",
+        "publisher_platforms": rng.choice(META_PLATFORMS),
+        "demographic_distribution": {
+            "age": AGE_RANGES[first_age:first_age + rng.randint(2, 4)],
+            "gender": rng.choice([["male", "female"], ["female"], ["male"]]),
+        },
+    }
+
+
+def budget_approval(rng: random.Random, campaign: Dict[str, Any]) -> Dict[str, Any]:
+    approver = rng.choice(APPROVERS)
+    status = rng.choices(["APPROVED", "PENDING", "REJECTED"], weights=[85, 10, 5])[0]
+    return {
+        "ApprovalID": f"APR-{campaign['index'] + 1:03d}",
+        "CampaignID": campaign['key'],
+        "CampaignName": campaign['name'],
+        "ApprovedAmount": str(int(campaign['budget'])),
+        "Currency": "EUR" if campaign['region'] == "EMEA" else "USD",
+        "CostCenter": rng.choice(COST_CENTERS),
+        "ApprovalDate": (campaign['start_date'] - timedelta(days=rng.randint(7, 30))).isoformat(),
+        "EffectiveDate": campaign['start_date'].isoformat(),
+        "ApproverName": approver,
+        "ApproverEmail": f"{approver.lower().replace(' ', '.')}@company.com",
+        "Status": status,
+        "Notes": rng.choice(APPROVAL_NOTES),
+    }
+
+
+def write_json_array(path: Path, records: Iterator[Dict[str, Any]], prefix: str, suffix: str) -> int:
+    """Write prefix, the records as a JSON array, then suffix; returns the count"""
+    count = 0
+    with open(path, "w") as f:
+        f.write(prefix + "[")
+        for record in records:
+            f.write(("," if count else "") + "\n    " + json.dumps(record))
+            count += 1
+        f.write("\n  ]" + suffix + "\n")
+    return count
+
+
+def write_approvals_xml(path: Path, records: Iterator[Dict[str, Any]]) -> int:
+    """Write approvals.xml in the bundled file's layout; returns the count"""
+    count = 0
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<BudgetApprovals>\n')
+        for record in records:
+            fields = "".join(f"    <{name}>{escape(value)}</{name}>\n" for name, value in record.items())
+            f.write(f"  <Approval>\n{fields}  </Approval>\n")
+            count += 1
+        f.write("</BudgetApprovals>\n")
+    return count
+
+
+def _tiktok_suffix(seed: int) -> str:
+    return f',\n  "code": 0,\n  "message": "OK",\n  "request_id": "{seed:019d}"\n}}'
+
+
+# source -> (output file under the output dir, record builder, writer)
+FIXTURES: Dict[str, tuple] = {
+    'google': (
+        "google-ads/fixtures.json",
+        google_campaign,
+        lambda path, records, seed: write_json_array(path, records, '{\n  "campaigns": ', "\n}"),
+    ),
+    'tiktok': (
+        "tiktok-api/fixtures.json",
+        tiktok_campaign,
+        lambda path, records, seed: write_json_array(
+            path, records, '{\n  "data": {\n  "campaigns": ', "\n  }" + _tiktok_suffix(seed)
+        ),
+    ),
+    'meta': (
+        "meta-api/meta-ads.json",
+        meta_ad,
+        lambda path, records, seed: write_json_array(path, records, '{\n  "ads": ', "\n}"),
+    ),
+    'soap': (
+        "soap-budget/approvals.xml",
+        budget_approval,
+        lambda path, records, seed: write_approvals_xml(path, records),
+    ),
+}
+
+
+def generate_fixtures(
+    records: int = DEFAULT_RECORDS,
+    seed: int = DEFAULT_SEED,
+    output_dir: Path = DEFAULT_OUTPUT_DIR,
+    sources: Optional[List[str]] = None
+) -> Dict[str, Path]:
+    """
+    Generate fixtures for the selected mocks
+
+    Args:
+        records: Records per source (one per synthetic campaign)
+        seed: Random seed; the same seed gives the same files
+        output_dir: Directory to write the mocks' files to
+        sources: Sources to generate (default: all of FIXTURES)
+
+    Returns:
+        Written file per source
+    """
+    sources = sources or list(FIXTURES)
+    unknown = [source for source in sources if source not in FIXTURES]
+    if unknown:
+        raise ValueError(f"Unknown source(s): {', '.join(unknown)}. Available: {list(FIXTURES)}")
+
+    output_dir = Path(output_dir)
+    written = {}
+    for source in sources:
+        relative_path, build, write = FIXTURES[source]
+        path = output_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Per-source randomness, independent of the other sources
+        rng = random.Random(f"{seed}:{source}")
+        started = time.perf_counter()
+        count = write(path, (build(rng, campaign) for campaign in iter_campaigns(records, seed)), seed)
+        print(f"✅ {source}: {count:,} records -> {path} "
+              f"({path.stat().st_size / 1e6:,.1f} MB, {time.perf_counter() - started:.1f}s)")
+        written[source] = path
+
+    manifest = {
+        'records': records,
+        'seed': seed,
+        'sources': {source: str(path.relative_to(output_dir)) for source, path in written.items()},
+        'id_bases': ID_BASES,
+        'campaign_key': "NIKE-{index + 1:07d}",
+        'approval_id': "APR-{index + 1:03d}",
+    }
+    (output_dir / "manifest.json").write_text(json.dumps(manifest, indent=2) + "\n")
+
+    return written
+
+
+def _record_count(value: str) -> int:
+    """Counts like 10000, 10_000, 100k or 10M"""
+    value = value.strip().lower().replace("_", "")
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    count = int(value[:-1] if multiplier > 1 else value) * multiplier
+    if count < 1:
+        raise argparse.ArgumentTypeError("record count must be positive")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate large synthetic fixtures for the mock servers")
+    parser.add_argument(
+        "--records",
+        type=_record_count,
+        default=DEFAULT_RECORDS,
+        help=f"records per source, e.g. 100k or 10M (default: {DEFAULT_RECORDS:,})"
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"random seed (default: {DEFAULT_SEED})")
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=DEFAULT_OUTPUT_DIR,
+        help="directory for the generated files (default: mocks/generated)"
+    )
+    parser.add_argument(
+        "--sources",
+        help=f"comma-separated sources to generate (default: all of {','.join(FIXTURES)})"
+    )
+    args = parser.parse_args()
+
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()] if args.sources else None
+    try:
+        generate_fixtures(args.records, args.seed, args.output_dir, sources)
+    except ValueError as e:
+        parser.error(str(e))
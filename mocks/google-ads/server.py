@@ -6,7 +6,7 @@ Provides realistic mock responses for Google Ads API endpoints
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Iterator
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, Query
@@ -14,13 +14,23 @@ from fastapi.responses import StreamingResponse
 import uvicorn
 
 
-# Load fixtures
-FIXTURES_PATH = Path(__file__).parent / "fixtures.json"
+# Load fixtures (MOCK_FIXTURES_DIR: generated ones, see mocks/generate_fixtures.py)
+FIXTURES_PATH = (
+    Path(os.environ["MOCK_FIXTURES_DIR"]) / "google-ads" / "fixtures.json"
+    if os.getenv("MOCK_FIXTURES_DIR")
+    else Path(__file__).parent / "fixtures.json"
+)
 
 with open(FIXTURES_PATH, "r") as f:
     FIXTURES = json.load(f)
 
 
+# Rows per searchStream batch (the real API sends up to 10,000)
+SEARCH_STREAM_BATCH_SIZE = int(os.getenv("SEARCH_STREAM_BATCH_SIZE", 10000))
+
+SEARCH_FIELD_MASK = "campaign.id,campaign.name,campaign.status,metrics.impressions,metrics.clicks,metrics.costMicros,campaignBudget.amountMicros"
+
+
 app = FastAPI(
     title="Google Ads API Mock Server",
     description="Mock server for Google Ads API v16 endpoints",
@@ -90,6 +100,41 @@ def build_google_ads_row(campaign: Dict[str, Any], custom_date: Optional[str] =
     return row
 
 
+def stream_search_batches(
+    campaigns: Iterable[Dict[str, Any]],
+    customer_id: str,
+    end_date: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Yield a searchStream response body piece by piece.
+
+    Rows are built lazily and every SEARCH_STREAM_BATCH_SIZE of them are sent
+    as one SearchGoogleAdsStreamResponse object, so the first batch goes out
+    before later rows exist and memory holds one batch at most.
+    """
+
+    def response_object(results: List[Dict[str, Any]], index: int) -> str:
+        return json.dumps({
+            "results": results,
+            "fieldMask": SEARCH_FIELD_MASK,
+            "requestId": f"req_{customer_id}_stream_{index}",
+        })
+
+    yield "["
+    batches = 0
+    batch = []
+    for campaign in campaigns:
+        batch.append(build_google_ads_row(campaign, custom_date=end_date or campaign["end_date"]))
+        if len(batch) >= SEARCH_STREAM_BATCH_SIZE:
+            yield ("," if batches else "") + response_object(batch, batches)
+            batches += 1
+            batch = []
+
+    if batch:
+        yield ("," if batches else "") + response_object(batch, batches)
+    yield "]"
+
+
 def filter_campaigns_by_date(
     campaigns: List[Dict[str, Any]],
     start_date: Optional[str] = None,
@@ -138,7 +183,8 @@ async def search_stream(
     """
     Mock implementation of Google Ads API v16 searchStream endpoint.
 
-    Returns campaign data in Google Ads API format.
+    Returns campaign data in Google Ads API format, streamed in batches of
+    SEARCH_STREAM_BATCH_SIZE results.
     Query parameters:
     - start_date: Filter campaigns by start date (YYYY-MM-DD)
     - end_date: Filter campaigns by end date (YYYY-MM-DD)
@@ -154,23 +200,12 @@ async def search_stream(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    # Build response in Google Ads API format
-    # The API returns an array of response objects, each containing a results array
-    response_data = []
-
-    for campaign in filtered_campaigns:
-        row = build_google_ads_row(campaign, custom_date=end_date or campaign["end_date"])
-
-        response_object = {
-            "results": [row],
-            "fieldMask": "campaign.id,campaign.name,campaign.status,metrics.impressions,metrics.clicks,metrics.costMicros,campaignBudget.amountMicros",
-            "requestId": f"req_{customer_id}_{campaign['id']}",
-        }
-
-        response_data.append(response_object)
-
-    # Return as JSON
-    return response_data
+    # The API returns a JSON array of response objects, each holding a batch
+    # of results; batches are sent as they are built
+    return StreamingResponse(
+        stream_search_batches(filtered_campaigns, customer_id, end_date),
+        media_type="application/json",
+    )
 
 
 @app.post("/googleads/v16/customers/{customer_id}/googleAds:search")
@@ -203,7 +238,7 @@ async def search(
 
     return {
         "results": results,
-        "fieldMask": "campaign.id,campaign.name,campaign.status,metrics.impressions,metrics.clicks,metrics.costMicros,campaignBudget.amountMicros",
+        "fieldMask": SEARCH_FIELD_MASK,
         "totalResultsCount": str(len(results)),
         "requestId": f"req_{customer_id}_search",
     }
@@ -213,12 +248,17 @@ async def search(
 async def list_campaigns(
     status: Optional[str] = Query(None, description="Filter by status (ENABLED, PAUSED)"),
     channel: Optional[str] = Query(None, description="Filter by channel (YouTube, Google Display, Search)"),
+    start_date: Optional[str] = Query(None, description="Campaigns running on or after this date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="Campaigns starting on or before this date (YYYY-MM-DD)"),
 ):
     """
     Convenience endpoint to list available campaigns with filters.
     """
 
-    campaigns = FIXTURES["campaigns"].copy()
+    try:
+        campaigns = filter_campaigns_by_date(FIXTURES["campaigns"], start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     if status:
         campaigns = [c for c in campaigns if c["status"] == status.upper()]
@@ -11,8 +11,11 @@ import os
 
 app = Flask(__name__)
 
-# Load approvals XML
-approvals_file = os.path.join(os.path.dirname(__file__), 'approvals.xml')
+# Load approvals XML (MOCK_FIXTURES_DIR: generated ones, see mocks/generate_fixtures.py)
+if os.getenv('MOCK_FIXTURES_DIR'):
+    approvals_file = os.path.join(os.environ['MOCK_FIXTURES_DIR'], 'soap-budget', 'approvals.xml')
+else:
+    approvals_file = os.path.join(os.path.dirname(__file__), 'approvals.xml')
 approvals_tree = ET.parse(approvals_file)
 approvals_root = approvals_tree.getroot()
 
@@ -44,8 +44,10 @@ class BudgetApprovalService(ServiceBase):
         if cls._approvals:
             return
 
+        # MOCK_FIXTURES_DIR: generated approvals, see mocks/generate_fixtures.py
         xml_path = os.path.join(
-            os.path.dirname(__file__),
+            os.path.join(os.environ['MOCK_FIXTURES_DIR'], 'soap-budget')
+            if os.getenv('MOCK_FIXTURES_DIR') else os.path.dirname(__file__),
             'approvals.xml'
         )
 
@@ -8,16 +8,19 @@ const PORT = process.env.PORT || 3003;
 // Middleware
 app.use(express.json());
 
-// Load fixtures
-const fixturesPath = path.join(__dirname, 'fixtures.json');
+// Load fixtures (MOCK_FIXTURES_DIR: generated ones, see mocks/generate_fixtures.py)
+const fixturesPath = process.env.MOCK_FIXTURES_DIR
+  ? path.join(process.env.MOCK_FIXTURES_DIR, 'tiktok-api', 'fixtures.json')
+  : path.join(__dirname, 'fixtures.json');
 const fixtures = JSON.parse(fs.readFileSync(fixturesPath, 'utf8'));
 
 /**
  * GET /open_api/v1.3/campaign/get/
- * Returns campaigns with optional filtering by advertiser_id and date range
+ * Returns campaigns with optional filtering by advertiser_id, date range
+ * and modified_since (Unix timestamp, compared with modify_time)
  */
 app.get('/open_api/v1.3/campaign/get/', (req, res) => {
-  const { advertiser_id, start_date, end_date } = req.query;
+  const { advertiser_id, start_date, end_date, modified_since } = req.query;
 
   // Start with all campaigns
   let campaigns = fixtures.data.campaigns;
@@ -47,6 +50,12 @@ app.get('/open_api/v1.3/campaign/get/', (req, res) => {
     });
   }
 
+  // Incremental sync: only campaigns modified at or after a Unix timestamp
+  if (modified_since) {
+    const since = parseInt(modified_since, 10);
+    campaigns = campaigns.filter(campaign => campaign.modify_time >= since);
+  }
+
   // Build response matching TikTok API structure
   const response = {
     data: {
@@ -15,11 +15,16 @@ import json
 import duckdb
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Callable, Dict, List, Any, Optional, Tuple
 import re
 
 # Import dynamic driver generation
 from driver_manager import DriverManager
+from agent_service import CursorPool, DEFAULT_PORT, DEFAULT_POOL_SIZE, query_service, serve
+from freshness import FRESHNESS_TABLE, load_freshness_sla, read_freshness_catalog, stale_sources
+from metrics import read_metrics
+from query_cache import QueryCache, default_query_cache, intent_cache_key
+from unified import SOURCE_PARTITIONS, UNIFIED_TABLE
 
 # Known API endpoints for different sources
 API_CONFIGS = {
@@ -50,12 +55,60 @@ API_CONFIGS = {
     }
 }
 
+# All sources the agent can query
+ALL_SOURCES = ['meta', 'google', 'tiktok', 'seznam', 'soap']
+
+# Columns returned per campaign by query_database
+RESULT_COLUMNS = [
+    'campaign_name',
+    'source',
+    'channel',
+    'budget',
+    'impressions',
+    'start_date',
+    'end_date'
+]
+
+def _sql_literal(value: Any) -> str:
+    """
+    Render a bound parameter as a DuckDB literal for EXECUTE
+
+    DuckDB cannot take ? parameters on EXECUTE itself, so values are passed
+    as typed literals into an already-planned statement; they can only fill
+    the statement's $n slots, never change its SQL.
+    """
+    if isinstance(value, bool) or value is None:
+        raise TypeError(f"Unsupported query parameter: {value!r}")
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return f"{value!r}::DOUBLE"
+    if isinstance(value, datetime):
+        return f"TIMESTAMP '{value.isoformat(sep=' ')}'"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, list):
+        return "[" + ", ".join(_sql_literal(item) for item in value) + "]"
+    raise TypeError(f"Unsupported query parameter: {value!r}")
+
+
 class NikeCampaignsAgent:
-    def __init__(self, db_path: str = "nike_campaigns.duckdb"):
+    def __init__(
+        self,
+        db_path: str = "nike_campaigns.duckdb",
+        pool: Optional[CursorPool] = None,
+        cache: Optional[QueryCache] = None
+    ):
         self.db_path = db_path
         self.logs = []
         self.pipelines_dir = Path(__file__).parent
         self.driver_manager = DriverManager(self.pipelines_dir)
+        self.pool = pool
+        self.cache = cache if cache is not None else default_query_cache()
+        self.freshness_sla = load_freshness_sla()
+        self._lease = None
+        self._conn = None
+        self._prepared = {}
 
     def log(self, message: str):
         """Add log message with timestamp"""
@@ -102,7 +155,7 @@ class NikeCampaignsAgent:
 
         # If no specific source mentioned, use all
         if not intent['sources']:
-            intent['sources'] = ['meta', 'google', 'tiktok', 'seznam', 'soap']
+            intent['sources'] = list(ALL_SOURCES)
 
         # Detect freshness requirements
         if any(word in query_lower for word in ['latest', 'recent', 'fresh', 'new', 'update', 'refresh']):
@@ -142,28 +195,46 @@ class NikeCampaignsAgent:
 
     def check_data_status(self) -> Dict[str, Any]:
         """
-        Check if data exists and when it was last updated
+        Check if data exists and how fresh each source is
+
+        Reads the per-source freshness catalog written by the pipeline
+        (dlt load time + cached row count) instead of counting every table.
 
         Returns:
             {
                 'exists': bool,
                 'tables': list,
                 'row_counts': dict,
-                'last_updated': datetime | None,
-                'is_fresh': bool (< 1 hour old)
+                'sources': {source: {'last_updated', 'row_count', 'is_fresh'}},
+                'stale_sources': list (sources past their SLA or never loaded),
+                'last_updated': datetime | None (most recent source load),
+                'is_fresh': bool (no source past its SLA),
+                'unified': bool (unified_campaigns table built),
+                'throughput': {
+                    'last_run': float | None (Unix time the last pipeline run finished),
+                    'sources': {source: {'rows', 'rows_per_second', 'durations', 'requests'}},
+                    'regressions': list (sources whose rows/s dropped, see metrics.py)
+                }
             }
         """
+        throughput = self._throughput_status()
+        missing = {
+            'exists': False,
+            'tables': [],
+            'row_counts': {},
+            'sources': {},
+            'stale_sources': list(ALL_SOURCES),
+            'last_updated': None,
+            'is_fresh': False,
+            'unified': False,
+            'throughput': throughput
+        }
+
         if not os.path.exists(self.db_path):
-            return {
-                'exists': False,
-                'tables': [],
-                'row_counts': {},
-                'last_updated': None,
-                'is_fresh': False
-            }
+            return missing
 
         try:
-            conn = duckdb.connect(self.db_path, read_only=True)
+            conn = self._get_connection()
 
             # Get campaign tables from marketing_data schema
             tables = conn.execute("""
@@ -173,37 +244,72 @@ class NikeCampaignsAgent:
                 AND table_name LIKE '%campaigns'
             """).fetchall()
 
-            table_names = [t[0] for t in tables]
-
-            # Get row counts
-            row_counts = {}
-            for table in table_names:
-                count = conn.execute(f"SELECT COUNT(*) FROM marketing_data.{table}").fetchone()[0]
-                row_counts[table] = count
-
-            # Check file modification time as proxy for last update
-            file_mtime = datetime.fromtimestamp(os.path.getmtime(self.db_path))
-            is_fresh = (datetime.now() - file_mtime) < timedelta(hours=1)
-
-            conn.close()
+            table_names = [t[0] for t in tables if t[0] != UNIFIED_TABLE]
+            unified = any(t[0] == UNIFIED_TABLE for t in tables)
+
+            # Databases built before the catalog existed count as never loaded
+            try:
+                catalog = read_freshness_catalog(conn)
+            except duckdb.CatalogException:
+                catalog = {}
+
+            stale = stale_sources(catalog, ALL_SOURCES, self.freshness_sla)
+            sources = {
+                source: {
+                    'last_updated': entry['last_updated'],
+                    'row_count': entry['row_count'],
+                    'is_fresh': source not in stale
+                }
+                for source, entry in catalog.items()
+            }
+            row_counts = {
+                SOURCE_PARTITIONS[source][0]: entry['row_count']
+                for source, entry in catalog.items()
+                if source in SOURCE_PARTITIONS
+            }
+            last_updated = max((e['last_updated'] for e in catalog.values()), default=None)
 
             return {
                 'exists': True,
                 'tables': table_names,
                 'row_counts': row_counts,
-                'last_updated': file_mtime,
-                'is_fresh': is_fresh
+                'sources': sources,
+                'stale_sources': stale,
+                'last_updated': last_updated,
+                'is_fresh': not stale,
+                'unified': unified,
+                'throughput': throughput
             }
 
         except Exception as e:
             self.log(f"Error checking data status: {e}")
-            return {
-                'exists': False,
-                'tables': [],
-                'row_counts': {},
-                'last_updated': None,
-                'is_fresh': False
-            }
+            return missing
+
+    def _throughput_status(self) -> Dict[str, Any]:
+        """Last pipeline run's per-source throughput, from the metrics file"""
+        try:
+            metrics = read_metrics()
+        except (OSError, ValueError) as e:
+            self.log(f"Error reading pipeline metrics: {e}")
+            metrics = None
+
+        if not metrics or not metrics.get('runs'):
+            return {'last_run': None, 'sources': {}, 'regressions': []}
+
+        last_run = metrics['runs'][-1]
+        return {
+            'last_run': last_run['finished_at'],
+            'sources': {
+                source: {
+                    'rows': entry['rows'],
+                    'rows_per_second': entry['rows_per_second'],
+                    'durations': entry['durations'],
+                    'requests': entry['http']['requests'],
+                }
+                for source, entry in last_run['sources'].items()
+            },
+            'regressions': metrics.get('regressions', []),
+        }
 
     def check_and_build_drivers(self, sources: List[str]) -> Dict[str, bool]:
         """
@@ -273,106 +379,118 @@ class NikeCampaignsAgent:
             self.log("📦 No data found - need to build pipeline")
             return 'refresh'
 
-        # If fresh data explicitly requested and data is stale
-        if intent['needs_fresh_data'] and not data_status['is_fresh']:
-            self.log("🔄 Fresh data requested and current data is stale")
+        # Raw tables from an older pipeline run but no unified table yet
+        if not data_status.get('unified'):
+            self.log("📦 Unified campaigns table missing - need to run pipeline")
             return 'refresh'
 
+        # If fresh data explicitly requested and a requested source is stale
+        if intent['needs_fresh_data']:
+            stale = self.sources_to_refresh(intent, data_status)
+            if stale:
+                self.log(f"🔄 Fresh data requested and stale: {', '.join(stale)}")
+                return 'refresh'
+
         # If data exists and is acceptable, query it
         self.log("✅ Data exists and is acceptable - will query")
         return 'query'
 
+    def sources_to_refresh(self, intent: Dict[str, Any], data_status: Dict[str, Any]) -> List[str]:
+        """
+        Sources a refresh should reload
+
+        Everything when the database or the unified table is missing,
+        otherwise only the requested sources that are past their SLA.
+        """
+        if not data_status['exists'] or not data_status.get('unified'):
+            return list(ALL_SOURCES)
+
+        stale = data_status.get('stale_sources', ALL_SOURCES)
+        return [source for source in intent['sources'] if source in stale]
+
     def query_database(self, intent: Dict[str, Any]) -> Tuple[List[Dict], Dict[str, Any]]:
         """
         Query the DuckDB database based on intent
 
+        Repeated questions are answered from the query cache as long as no
+        pipeline load has committed since they were computed.
+
         Returns: (results, summary)
         """
-        conn = duckdb.connect(self.db_path, read_only=True)
-
-        # Build unified campaigns view with UNION
-        union_query = """
-            SELECT
-                id as campaign_id,
-                page_name as campaign_name,
-                'meta' as source,
-                'Facebook/Instagram' as channel,
-                CAST(spend__upper_bound AS DOUBLE) as budget,
-                CAST(impressions__upper_bound AS INTEGER) as impressions,
-                ad_delivery_start_time as start_date,
-                ad_delivery_stop_time as end_date
-            FROM marketing_data.meta_campaigns
-
-            UNION ALL
-
-            SELECT
-                CAST(id AS VARCHAR) as campaign_id,
-                name as campaign_name,
-                'google' as source,
-                channel,
-                budget_micros / 1000000.0 as budget,
-                metrics__impressions as impressions,
-                start_date,
-                end_date
-            FROM marketing_data.google_campaigns
-
-            UNION ALL
-
-            SELECT
-                campaign_id,
-                campaign_name,
-                'tiktok' as source,
-                'TikTok' as channel,
-                CAST(budget AS DOUBLE) as budget,
-                COALESCE(TRY_CAST(metrics__impressions AS INTEGER), 0) as impressions,
-                start_time as start_date,
-                end_time as end_date
-            FROM marketing_data.tiktok_campaigns
-
-            UNION ALL
-
-            SELECT
-                campaign_id,
-                name as campaign_name,
-                'seznam' as source,
-                channel,
-                budget_czk / 25.0 as budget,  -- Convert CZK to USD (~25 CZK/USD)
-                COALESCE(total_impressions, 0) as impressions,
-                TRY_CAST(created AS TIMESTAMP) as start_date,
-                TRY_CAST(updated AS TIMESTAMP) as end_date
-            FROM marketing_data.seznam_campaigns
-
-            UNION ALL
-
-            SELECT
-                approval_id as campaign_id,
-                campaign_name,
-                'soap' as source,
-                'Budget System' as channel,
-                approved_amount as budget,
-                0 as impressions,
-                TRY_CAST(approval_date AS TIMESTAMP) as start_date,
-                NULL as end_date
-            FROM marketing_data.budget_approvals
+        data_version = self._data_version()
+        if data_version is None:
+            return self._run_query(intent)
+
+        key = intent_cache_key(intent)
+        cached = self.cache.get(key, data_version)
+        stats = self.cache.stats()
+        if cached is not None:
+            self.log(f"⚡ Cache hit ({stats['hits']} hits / {stats['misses']} misses)")
+            results, summary = cached
+            return results, summary
+
+        self.log(f"🗄️ Cache miss ({stats['hits']} hits / {stats['misses']} misses)")
+        results, summary = self._run_query(intent)
+        self.cache.put(key, data_version, (results, summary))
+        return results, summary
+
+    def _data_version(self) -> Optional[str]:
         """
+        Latest committed dlt load plus the latest unified partition refresh,
+        used to invalidate cached results
+
+        unified_campaigns can change without a new load (schema migration,
+        full partition rewrites, prunes), so the freshness catalog's
+        refreshed_at times are part of the version.
+        """
+        conn = self._get_connection()
+        try:
+            load_id, loads = conn.execute("""
+                SELECT MAX(load_id), COUNT(*)
+                FROM marketing_data._dlt_loads
+                WHERE status = 0
+            """).fetchone()
+        except duckdb.Error:
+            return None
+        if not load_id:
+            return None
 
-        # Build WHERE clauses
+        try:
+            refreshed_at, refreshes = conn.execute(f"""
+                SELECT MAX(refreshed_at), COUNT(*)
+                FROM marketing_data.{FRESHNESS_TABLE}
+            """).fetchone()
+        except duckdb.Error:
+            refreshed_at, refreshes = None, 0
+        return f"{load_id}:{loads}:{refreshed_at}:{refreshes}"
+
+    def _run_query(self, intent: Dict[str, Any]) -> Tuple[List[Dict], Dict[str, Any]]:
+        """Run the prepared campaigns query for an intent"""
+        # Build WHERE clauses with $n placeholders; values are bound at EXECUTE
         where_clauses = []
+        params = []
+
+        def bind(value) -> str:
+            params.append(value)
+            return f"${len(params)}"
 
         # Source filtering (fixed: < 5 instead of < 4 to properly detect "all sources")
-        if intent['sources'] and len(intent['sources']) < 5:
-            sources_str = "', '".join(intent['sources'])
-            where_clauses.append(f"source IN ('{sources_str}')")
+        if intent['sources'] and len(intent['sources']) < len(ALL_SOURCES):
+            where_clauses.append(f"list_contains({bind(list(intent['sources']))}::VARCHAR[], source)")
 
         # Budget filtering
         if 'budget_min' in intent['filters']:
-            where_clauses.append(f"budget >= {intent['filters']['budget_min']}")
-
-        # Date filtering
-        if 'month' in intent['filters']:
-            where_clauses.append(f"EXTRACT(MONTH FROM start_date) = {intent['filters']['month']}")
-        if 'year' in intent['filters']:
-            where_clauses.append(f"EXTRACT(YEAR FROM start_date) = {intent['filters']['year']}")
+            where_clauses.append(f"budget >= {bind(float(intent['filters']['budget_min']))}")
+
+        # Date filtering: a [start, end) range on start_date when the year is
+        # known, so DuckDB can skip row groups by min/max instead of evaluating
+        # EXTRACT on every row
+        date_range = self._date_range(intent['filters'])
+        if date_range:
+            where_clauses.append(f"start_date >= {bind(date_range[0])} AND start_date < {bind(date_range[1])}")
+        elif 'month' in intent['filters']:
+            # A month without a year matches that month in any year
+            where_clauses.append(f"month(start_date) = {bind(int(intent['filters']['month']))}")
 
         where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
 
@@ -385,38 +503,54 @@ class NikeCampaignsAgent:
         else:
             order_sql = "budget DESC"
 
-        # Build full query
+        limit_sql = bind(int(intent['limit']))
+
+        # One execution for both the top-N rows and the summary aggregates.
+        # `filtered` is deliberately NOT MATERIALIZED: copying the filtered rows
+        # costs more than letting DuckDB read the columnar table inside the same
+        # plan. The summary is LEFT JOINed onto the top rows so it comes back
+        # even when nothing matches (or the limit is 0); `matched` tells real
+        # top rows from that lone summary row.
         query = f"""
-            SELECT
-                campaign_name,
-                source,
-                channel,
-                budget,
-                impressions,
-                start_date,
-                end_date
-            FROM ({union_query})
-            WHERE {where_sql}
+            WITH filtered AS NOT MATERIALIZED (
+                SELECT {', '.join(RESULT_COLUMNS)}
+                FROM marketing_data.unified_campaigns
+                WHERE {where_sql}
+            ),
+            top_rows AS (
+                SELECT *, TRUE as matched
+                FROM filtered
+                ORDER BY {order_sql}
+                LIMIT {limit_sql}
+            ),
+            summary AS (
+                SELECT
+                    COUNT(*) as total,
+                    STRING_AGG(DISTINCT source, ', ' ORDER BY source) as sources,
+                    STRING_AGG(DISTINCT channel, ', ' ORDER BY channel) as channels,
+                    SUM(budget) as total_budget,
+                    SUM(impressions) as total_impressions
+                FROM filtered
+            )
+            SELECT top_rows.*, summary.*
+            FROM summary
+            LEFT JOIN top_rows ON TRUE
             ORDER BY {order_sql}
-            LIMIT {intent['limit']}
         """
 
+        # The SQL text only depends on the intent shape (which filters are
+        # present, sort order), so each shape is planned once per connection
+        conn = self._get_connection()
+        statement = self._prepare(conn, query)
+
         self.log(f"🔍 Executing SQL query...")
-        results = conn.execute(query).fetchdf()
-
-        # Generate summary
-        summary_query = f"""
-            SELECT
-                COUNT(*) as total,
-                STRING_AGG(DISTINCT source, ', ' ORDER BY source) as sources,
-                STRING_AGG(DISTINCT channel, ', ' ORDER BY channel) as channels,
-                SUM(budget) as total_budget,
-                SUM(impressions) as total_impressions
-            FROM ({union_query})
-            WHERE {where_sql}
-        """
+        args = ", ".join(_sql_literal(value) for value in params)
+        rows = conn.execute(f"EXECUTE {statement}({args})").fetchall()
 
-        summary_row = conn.execute(summary_query).fetchone()
+        # Split each row into the result columns, the matched flag and the
+        # (repeated) summary
+        n_cols = len(RESULT_COLUMNS)
+        summary_row = rows[0][n_cols + 1:]
         summary = {
             'total': summary_row[0],
             'sources': summary_row[1].split(', ') if summary_row[1] else [],
@@ -425,49 +559,139 @@ class NikeCampaignsAgent:
             'total_impressions': int(summary_row[4]) if summary_row[4] else 0
         }
 
-        conn.close()
-
-        # Convert results to list of dicts
-        results_list = results.to_dict('records')
+        # Convert results to list of dicts (no top rows -> only the summary row)
+        results_list = [dict(zip(RESULT_COLUMNS, row[:n_cols])) for row in rows if row[n_cols]]
 
         return results_list, summary
 
-    def refresh_pipeline(self) -> bool:
+    def _date_range(self, filters: Dict[str, Any]) -> Optional[Tuple[datetime, datetime]]:
+        """[start, end) start_date range for year / year+month filters"""
+        year = filters.get('year')
+        if not year:
+            return None
+
+        month = filters.get('month')
+        if month:
+            start = datetime(year, month, 1)
+            end = datetime(year + month // 12, month % 12 + 1, 1)
+        else:
+            start = datetime(year, 1, 1)
+            end = datetime(year + 1, 1, 1)
+
+        return start, end
+
+    def _get_connection(self) -> duckdb.DuckDBPyConnection:
         """
-        Run the data extraction pipeline to refresh data
+        Lazily open the read-only connection that holds prepared statements
+
+        In service mode the connection is a cursor leased from the shared pool,
+        together with the statements already prepared on it.
         """
-        import subprocess
+        if self._conn is None:
+            if self.pool:
+                self._lease = self.pool.acquire()
+                self._conn, self._prepared = self._lease.cursor, self._lease.prepared
+            else:
+                self._conn = duckdb.connect(self.db_path, read_only=True)
+                self._prepared = {}
+        return self._conn
+
+    def _prepare(self, conn: duckdb.DuckDBPyConnection, query: str) -> str:
+        """PREPARE a query once per connection and return the statement name"""
+        if query not in self._prepared:
+            statement = f"campaigns_q{len(self._prepared) + 1}"
+            conn.execute(f"PREPARE {statement} AS {query}")
+            self._prepared[query] = statement
+        return self._prepared[query]
+
+    def close(self):
+        """Close the DuckDB connection (drops its prepared statements) or return it to the pool"""
+        if self._lease is not None:
+            self.pool.release(self._lease)
+            self._lease = None
+        elif self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._prepared = {}
+
+    def refresh_pipeline(
+        self,
+        sources: Optional[List[str]] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        full_reload: bool = False
+    ) -> bool:
+        """
+        Run the data extraction pipeline to refresh data
 
-        self.log("🔄 Starting data pipeline refresh...")
+        Sources load incrementally (only what changed since their last
+        load) unless full_reload is set.
+
+        Args:
+            sources: Sources to reload (default: all); other sources' tables
+                are left untouched
+            on_progress: Optional callback also receiving every pipeline
+                progress event (see load_all_campaigns)
+            full_reload: Drop the sources' data and incremental cursors and
+                load everything again
+        """
+        if sources:
+            self.log(f"🔄 Starting data pipeline refresh for: {', '.join(sources)}...")
+        else:
+            self.log("🔄 Starting data pipeline refresh...")
+
+        # The pipeline needs a write lock on the DuckDB file
+        self.close()
+
+        if self.pool:
+            # Wait for in-flight service queries and close the shared database
+            with self.pool.exclusive():
+                return self._run_pipeline(sources, on_progress, full_reload)
+        return self._run_pipeline(sources, on_progress, full_reload)
+
+    def _run_pipeline(
+        self,
+        sources: Optional[List[str]] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        full_reload: bool = False
+    ) -> bool:
+        """Run load_all_campaigns in this process, logging its progress events"""
+        first_progress_ms = None
+
+        def log_progress(event: Dict[str, Any]):
+            nonlocal first_progress_ms
+            kind = event['event']
+            if first_progress_ms is None and kind == 'pages_fetched':
+                first_progress_ms = event['elapsed_ms']
+                self.log(f"⚡ First page after {first_progress_ms:.0f} ms")
+
+            if kind == 'source_started':
+                self.log(f"📊 Loading {event['description']}...")
+            elif kind == 'rows_normalized':
+                self.log(f"   {event['rows']} {event['source']} rows normalized")
+            elif kind == 'load_committed':
+                self.log(f"✅ {event['label']}: {event['unified_rows']} rows ({event['elapsed_ms']:.0f} ms)")
+            elif kind == 'source_partial':
+                self.log(f"⚠️  {event['label']} loaded partially: {event['error']}")
+            elif kind == 'source_failed':
+                self.log(f"❌ {event['label']} failed: {event['error']}")
+
+            if on_progress:
+                on_progress(event)
 
         try:
-            # Activate venv and run pipeline
-            venv_python = self.pipelines_dir / "venv" / "bin" / "python"
-            pipeline_script = self.pipelines_dir / "nike_campaigns_pipeline.py"
-
-            result = subprocess.run(
-                [str(venv_python), str(pipeline_script)],
-                cwd=str(self.pipelines_dir),
-                capture_output=True,
-                text=True,
-                timeout=60
+            # Imported lazily: only refreshes need dlt and the sources
+            from nike_campaigns_pipeline import load_all_campaigns
+
+            # Sources are independent APIs: fetch them concurrently
+            load_all_campaigns(
+                sources,
+                on_progress=log_progress,
+                parallel=True,
+                full_reload=full_reload
             )
+            self.log("✅ Pipeline refresh complete")
+            return True
 
-            # Log output
-            for line in result.stdout.split('\n'):
-                if line.strip():
-                    self.log(line)
-
-            if result.returncode == 0:
-                self.log("✅ Pipeline refresh complete")
-                return True
-            else:
-                self.log(f"❌ Pipeline failed: {result.stderr}")
-                return False
-
-        except subprocess.TimeoutExpired:
-            self.log("⏱️ Pipeline timed out")
-            return False
         except Exception as e:
             self.log(f"❌ Pipeline error: {e}")
             return False
@@ -507,7 +731,15 @@ class NikeCampaignsAgent:
         data_status = self.check_data_status()
         if data_status['exists']:
             self.log(f"💾 Found {sum(data_status['row_counts'].values())} total rows")
-            self.log(f"⏰ Last updated: {data_status['last_updated'].strftime('%Y-%m-%d %H:%M:%S')}")
+            if data_status['last_updated']:
+                self.log(f"⏰ Last updated: {data_status['last_updated'].strftime('%Y-%m-%d %H:%M:%S')}")
+            if data_status['stale_sources']:
+                self.log(f"⌛ Stale sources: {', '.join(data_status['stale_sources'])}")
+            for regression in data_status['throughput']['regressions']:
+                self.log(
+                    f"🐢 {regression['source']} throughput regressed: {regression['rows_per_second']} rows/s "
+                    f"(usually {regression['baseline_rows_per_second']})"
+                )
         else:
             self.log("⚠️ No data found in database")
 
@@ -520,7 +752,7 @@ class NikeCampaignsAgent:
         success = True
 
         if action == 'refresh':
-            success = self.refresh_pipeline()
+            success = self.refresh_pipeline(self.sources_to_refresh(intent, data_status))
             if success:
                 # After refresh, query the data
                 results, summary = self.query_database(intent)
@@ -563,8 +795,8 @@ class NikeCampaignsAgent:
                 lines.append(f"\n{i}. {row.get('campaign_name', 'N/A')}")
                 lines.append(f"   Source: {row.get('source', 'N/A')}")
                 lines.append(f"   Channel: {row.get('channel', 'N/A')}")
-                lines.append(f"   Budget: ${row.get('budget', 0):,.2f}")
-                lines.append(f"   Impressions: {row.get('impressions', 0):,}")
+                lines.append(f"   Budget: ${row.get('budget') or 0:,.2f}")
+                lines.append(f"   Impressions: {row.get('impressions') or 0:,}")
                 lines.append(f"   Period: {row.get('start_date', 'N/A')} to {row.get('end_date', 'N/A')}")
 
         lines.append("\n" + "="*80)
@@ -582,23 +814,41 @@ class NikeCampaignsAgent:
 
 def main():
     """CLI interface for testing"""
-    if len(sys.argv) < 2:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Nike campaigns agent")
+    parser.add_argument("query", nargs="?", help="natural language question")
+    parser.add_argument("--serve", action="store_true", help="run as a persistent HTTP JSON service")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="service port")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="read-only DuckDB cursors in the service pool")
+    parser.add_argument("--local", action="store_true", help="answer in this process even if a service is running")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(port=args.port, pool_size=args.pool_size)
+        return
+
+    if not args.query:
         print("Usage: python agent.py 'your query here'")
+        print("       python agent.py --serve")
         sys.exit(1)
 
-    query = sys.argv[1]
-    agent = NikeCampaignsAgent()
-    result = agent.execute_query(query)
+    # Thin client: a running service answers with warm imports and connections
+    result = None if args.local else query_service(args.query)
+    if result is None:
+        agent = NikeCampaignsAgent()
+        result = agent.execute_query(args.query)
+        agent.close()
 
     # Print logs
-    for log in result['logs']:
+    for log in result.get('logs', []):
         print(log)
 
     # Print results
-    print(result['raw_output'])
+    print(result.get('raw_output') or result.get('error', ''))
 
     # Exit with status
-    sys.exit(0 if result['success'] else 1)
+    sys.exit(0 if result.get('success') else 1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+"""
+Agent Service Module
+
+Long-running mode for the Nike campaigns agent (`python agent.py --serve`):
+- Keeps the interpreter and imports warm between questions
+- Hands out read-only DuckDB cursors from a thread-safe pool; each cursor
+  keeps its own prepared statements, so hot queries skip planning while
+  questions overlap. The database is closed whenever no question is being
+  answered, so the pipeline and other processes can open it for writing
+- Answers NikeCampaignsAgent.execute_query over a local HTTP JSON protocol,
+  one thread per request
+
+Protocol:
+    GET  /health          -> {"status": "ok"}
+    POST /query           {"query": "..."} -> execute_query result
+    POST /refresh         {"sources": [...], "full_reload": bool}
+                          -> newline-delimited JSON
+                          pipeline progress events, then a final
+                          {"event": "refresh_finished", "success": bool}
+"""
+
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import duckdb
+
+from query_cache import json_default
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_POOL_SIZE = 4
+
+# Where the CLI thin client and the backend look for the service
+AGENT_SERVICE_URL = os.getenv("AGENT_SERVICE_URL", f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+
+
+class PooledCursor:
+    """A pooled DuckDB cursor plus the statements prepared on it"""
+
+    def __init__(self, cursor: duckdb.DuckDBPyConnection):
+        self.cursor = cursor
+        self.prepared: Dict[str, str] = {}
+
+
+class CursorPool:
+    """
+    Thread-safe pool of read-only DuckDB cursors
+
+    All cursors share one read-only database instance. A read-only DuckDB
+    instance keeps every other process from taking the write lock, so it is
+    closed when the last cursor comes back and reopened by the next
+    acquire(): the pipeline CLI, query.py and the backend can write between
+    questions. In-process refreshes use exclusive(), which waits until every
+    cursor is back and keeps the database closed for the duration.
+    """
+
+    def __init__(self, db_path: str, size: int = DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._exclusive_lock = threading.Lock()
+        self._conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._idle: List[PooledCursor] = []
+        self._in_use = 0
+
+    def acquire(self) -> PooledCursor:
+        """Check out a cursor, blocking while the pool is exhausted"""
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._conn is None:
+                    self._conn = duckdb.connect(self.db_path, read_only=True)
+                pooled = self._idle.pop() if self._idle else PooledCursor(self._conn.cursor())
+                self._in_use += 1
+                return pooled
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, pooled: PooledCursor):
+        """Return a cursor to the pool; the last one back closes the database"""
+        with self._lock:
+            self._in_use -= 1
+            self._idle.append(pooled)
+            if not self._in_use:
+                self._close_idle()
+        self._slots.release()
+
+    @contextmanager
+    def exclusive(self):
+        """Drain the pool and close the database, e.g. while the pipeline writes"""
+        # Serialize drains so two refreshes never each hold half the slots
+        with self._exclusive_lock:
+            for _ in range(self.size):
+                self._slots.acquire()
+            try:
+                self.close()
+                yield
+            finally:
+                for _ in range(self.size):
+                    self._slots.release()
+
+    def close(self):
+        """Close every idle cursor and the shared database instance"""
+        with self._lock:
+            self._close_idle()
+
+    def _close_idle(self):
+        """close() with self._lock held"""
+        for pooled in self._idle:
+            pooled.cursor.close()
+        self._idle = []
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def serve(
+    db_path: str = "nike_campaigns.duckdb",
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    pool_size: int = DEFAULT_POOL_SIZE
+):
+    """
+    Run the agent as a persistent HTTP JSON service
+
+    Args:
+        db_path: DuckDB database file
+        host: Interface to bind (local only by default)
+        port: Port to listen on
+        pool_size: Number of concurrently usable read-only cursors
+    """
+    from agent import NikeCampaignsAgent
+    from query_cache import default_query_cache
+
+    pool = CursorPool(db_path, size=pool_size)
+    cache = default_query_cache()
+
+    class AgentRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload, default=json_default).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", "db_path": db_path, "pool_size": pool_size})
+            else:
+                self._send_json(404, {"success": False, "error": "Not found"})
+
+        def _read_json(self) -> Optional[Dict[str, Any]]:
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                body = None
+            if not isinstance(body, dict):
+                self._send_json(400, {"success": False, "error": "Invalid JSON body"})
+                return None
+            return body
+
+        def do_POST(self):
+            if self.path == "/refresh":
+                self._refresh()
+                return
+            if self.path != "/query":
+                self._send_json(404, {"success": False, "error": "Not found"})
+                return
+
+            body = self._read_json()
+            if body is None:
+                return
+            query_text = body.get("query")
+
+            if not query_text:
+                self._send_json(400, {"success": False, "error": "Query is required"})
+                return
+
+            # One agent per request: logs are per question, cursors and cached
+            # results are shared
+            agent = NikeCampaignsAgent(db_path=db_path, pool=pool, cache=cache)
+            try:
+                result = agent.execute_query(query_text)
+            except Exception as e:
+                self._send_json(500, {"success": False, "error": str(e), "logs": agent.logs})
+                return
+            finally:
+                agent.close()
+
+            self._send_json(200, result)
+
+        def _refresh(self):
+            body = self._read_json()
+            if body is None:
+                return
+
+            # Stream progress events as they happen (connection closes at the end)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+
+            def send_event(event: Dict[str, Any]):
+                line = json.dumps(event, default=json_default) + "\n"
+                self.wfile.write(line.encode("utf-8"))
+                self.wfile.flush()
+
+            agent = NikeCampaignsAgent(db_path=db_path, pool=pool, cache=cache)
+            try:
+                success = agent.refresh_pipeline(
+                    body.get("sources"),
+                    on_progress=send_event,
+                    full_reload=bool(body.get("full_reload"))
+                )
+            except Exception as e:
+                success = False
+                agent.log(f"❌ Pipeline error: {e}")
+            finally:
+                agent.close()
+
+            send_event({"event": "refresh_finished", "success": success, "logs": agent.logs})
+
+        def log_message(self, format, *args):
+            # Agent logs already go to stdout; skip per-request access lines
+            pass
+
+    server = ThreadingHTTPServer((host, port), AgentRequestHandler)
+    server.daemon_threads = True
+
+    print(f"🚀 Agent service listening on http://{host}:{port} (pool size {pool_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down agent service")
+    finally:
+        server.server_close()
+        pool.close()
+
+
+def query_service(query_text: str, url: str = AGENT_SERVICE_URL, timeout: float = 120) -> Optional[Dict[str, Any]]:
+    """
+    Thin client: ask a running agent service
+
+    Returns:
+        execute_query result dict, or None if no service is listening
+    """
+    request = urllib.request.Request(
+        f"{url}/query",
+        data=json.dumps({"query": query_text}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+    except (urllib.error.URLError, ConnectionError):
+        return None
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Nike campaigns pipelines and agent
+
+Usage:
+    python benchmark.py query --rows 1000000 --repeat 20
+    python benchmark.py pipeline --repeat 3    # needs the mock servers running
+    python benchmark.py pipeline --http-cache record   # once, against the mocks
+    python benchmark.py pipeline --http-cache replay   # no servers, deterministic
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import duckdb
+
+from agent import NikeCampaignsAgent, RESULT_COLUMNS
+from http_cache import HTTP_CACHE_MODES, set_response_cache
+from unified import UNIFIED_TABLE, UNIFIED_COLUMNS
+
+
+def print_header(text):
+    """Print a formatted header"""
+    print()
+    print("=" * 70)
+    print(f"  {text}")
+    print("=" * 70)
+    print()
+
+
+def time_calls(func: Callable, repeat: int) -> Dict[str, float]:
+    """Run func `repeat` times and return p50/mean/min in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'p50': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'min': min(timings),
+    }
+
+
+def print_timings(name: str, timings: Dict[str, float]):
+    """Print one benchmark line"""
+    print(f"{name:<28} p50 {timings['p50']:9.2f} ms   mean {timings['mean']:9.2f} ms   min {timings['min']:9.2f} ms")
+
+
+def build_synthetic_unified_db(db_path: str, rows: int):
+    """Create a DuckDB file with `rows` synthetic unified_campaigns rows"""
+    conn = duckdb.connect(db_path)
+    conn.execute("CREATE SCHEMA IF NOT EXISTS marketing_data")
+    conn.execute(f"CREATE TABLE marketing_data.{UNIFIED_TABLE} ({UNIFIED_COLUMNS})")
+    conn.execute(f"""
+        INSERT INTO marketing_data.{UNIFIED_TABLE}
+        SELECT
+            'c_' || i,
+            'Nike Campaign ' || i,
+            ['meta', 'google', 'tiktok', 'seznam', 'soap'][1 + i % 5],
+            ['Facebook/Instagram', 'YouTube', 'TikTok', 'Seznam.cz', 'Budget System'][1 + i % 5],
+            (hash(i) % 5000000)::DOUBLE,
+            (hash(i * 7) % 50000000)::BIGINT,
+            TIMESTAMP '2024-01-01' + INTERVAL (i % 730) DAY,
+            TIMESTAMP '2024-02-01' + INTERVAL (i % 730) DAY,
+            (hash(i * 3) % 2500000)::DOUBLE,
+            (hash(i * 11) % 500000)::BIGINT,
+            (hash(i * 13) % 20000)::DOUBLE,
+            'USD',
+            '0'
+        FROM range({rows}) t(i)
+    """)
+    conn.close()
+
+
+def two_pass_query(db_path: str, intent: Dict) -> tuple:
+    """Reference implementation: separate top-N and summary scans"""
+    conn = duckdb.connect(db_path, read_only=True)
+    where_sql = "1=1"
+    if intent['sources'] and len(intent['sources']) < 5:
+        sources_str = "', '".join(intent['sources'])
+        where_sql = f"source IN ('{sources_str}')"
+
+    results = conn.execute(f"""
+        SELECT {', '.join(RESULT_COLUMNS)}
+        FROM marketing_data.{UNIFIED_TABLE}
+        WHERE {where_sql}
+        ORDER BY budget DESC
+        LIMIT {intent['limit']}
+    """).fetchall()
+    summary = conn.execute(f"""
+        SELECT
+            COUNT(*),
+            STRING_AGG(DISTINCT source, ', ' ORDER BY source),
+            STRING_AGG(DISTINCT channel, ', ' ORDER BY channel),
+            SUM(budget),
+            SUM(impressions)
+        FROM marketing_data.{UNIFIED_TABLE}
+        WHERE {where_sql}
+    """).fetchone()
+    conn.close()
+    return results, summary
+
+
+def benchmark_query(rows: int, repeat: int):
+    """Compare the two-pass query against the agent's single-statement query"""
+    print_header(f"QUERY BENCHMARK: {rows:,} unified rows, {repeat} runs")
+
+    intents: List[Dict] = [
+        {'sources': ['meta', 'google', 'tiktok', 'seznam', 'soap'], 'filters': {}, 'limit': 20},
+        {'sources': ['meta', 'tiktok'], 'filters': {}, 'limit': 20},
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "benchmark.duckdb")
+        build_synthetic_unified_db(db_path, rows)
+        agent = NikeCampaignsAgent(db_path=db_path)
+
+        # Fixed per-call cost shared by both variants
+        print_timings("connect + close", time_calls(lambda: duckdb.connect(db_path, read_only=True).close(), repeat))
+        print()
+
+        for intent in intents:
+            print(f"Sources: {', '.join(intent['sources'])}")
+            print_timings("two-pass (rows + summary)", time_calls(lambda: two_pass_query(db_path, intent), repeat))
+            with contextlib.redirect_stdout(io.StringIO()):
+                single = time_calls(lambda: agent.query_database(intent), repeat)
+            print_timings("single statement", single)
+            print()
+
+
+def source_durations(events: List[Dict]) -> Dict[str, float]:
+    """Milliseconds from source_started to load_committed per source"""
+    started = {e['source']: e['elapsed_ms'] for e in events if e['event'] == 'source_started'}
+    return {
+        e['source']: e['elapsed_ms'] - started[e['source']]
+        for e in events
+        if e['event'] == 'load_committed'
+    }
+
+
+def benchmark_pipeline(sources: List[str], repeat: int, http_cache: str = None):
+    """
+    Compare sequential and parallel load_all_campaigns against the local mocks
+
+    With http_cache='record' the responses are saved; 'replay' then re-runs
+    the same benchmark from disk without the mocks. Replay needs the same
+    sources and repeat count: incremental cursors are part of the requests.
+    """
+    print_header(f"PIPELINE BENCHMARK: {', '.join(sources)}, {repeat} runs"
+                 + (f", HTTP cache {http_cache}" if http_cache else ""))
+    cache = set_response_cache(http_cache)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the benchmark's database and dlt state away from the real ones
+        os.environ['DLT_DATA_DIR'] = str(Path(tmp) / "dlt")
+        os.chdir(tmp)
+        try:
+            from nike_campaigns_pipeline import load_all_campaigns
+
+            def run(parallel: bool) -> List[Dict]:
+                events: List[Dict] = []
+                with contextlib.redirect_stdout(io.StringIO()):
+                    load_all_campaigns(sources, on_progress=events.append, parallel=parallel)
+                failed = [e['source'] for e in events if e['event'] == 'source_failed']
+                if failed:
+                    raise RuntimeError(f"Sources failed (are the mocks running?): {', '.join(failed)}")
+                return events
+
+            # Warm-up: creates schemas and tables so every timed run is a refresh
+            durations = source_durations(run(parallel=False))
+            for source, ms in durations.items():
+                print(f"{source:<28} {ms:9.2f} ms")
+            print(f"{'sum of sources':<28} {sum(durations.values()):9.2f} ms")
+            print(f"{'slowest source':<28} {max(durations.values()):9.2f} ms")
+            print()
+
+            print_timings("sequential", time_calls(lambda: run(parallel=False), repeat))
+            print_timings("parallel", time_calls(lambda: run(parallel=True), repeat))
+            if cache:
+                print()
+                print(f"HTTP cache: {cache.stats()}")
+        finally:
+            os.chdir(cwd)
+            del os.environ['DLT_DATA_DIR']
+            set_response_cache(None)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Nike campaigns benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    query_parser = subparsers.add_parser("query", help="agent query_database latency")
+    query_parser.add_argument("--rows", type=int, default=1_000_000)
+    query_parser.add_argument("--repeat", type=int, default=20)
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="sequential vs parallel refresh against the mocks")
+    pipeline_parser.add_argument("--sources", default="meta,google,tiktok,soap,seznam")
+    pipeline_parser.add_argument("--repeat", type=int, default=3)
+    pipeline_parser.add_argument("--http-cache", choices=HTTP_CACHE_MODES)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "query":
+        benchmark_query(args.rows, args.repeat)
+    elif args.benchmark == "pipeline":
+        benchmark_pipeline(args.sources.split(","), args.repeat, args.http_cache)
+
+
+if __name__ == "__main__":
+    main()
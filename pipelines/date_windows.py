@@ -0,0 +1,245 @@
+"""
+Date Window Helpers
+
+Google's campaigns endpoint, TikTok's campaign/get and the SOAP
+GetCampaignApprovals call all filter by a date range, so one long range
+can be split into windows that are requested independently. fetch_windows
+fetches the windows of a range concurrently, with a bounded number in
+flight, and yields each window's items as soon as it completes:
+- Items are merged by primary key, since a campaign running across several
+  windows is returned by each of them
+- Every closed window (ending before today) is checkpointed in the dlt
+  resource state once fetched; a re-run skips it, so an interrupted
+  backfill resumes with the missing windows and a refresh only fetches
+  the current one. A full reload drops the state and fetches them all.
+- A window that yielded items still open (is_open: e.g. a campaign still
+  running, whose metrics keep changing) is not checkpointed, so it is
+  fetched again until they are final
+- Windows ending less than refetch_days ago are fetched on every run,
+  checkpointed or not, for items that change after their window closed
+  (e.g. an approval's status)
+- A failing window does not stop the others: it is left unchecked, so the
+  next run retries it, and kept with its error in the resource state, so
+  the caller can report the load as partial (failed_windows)
+
+Windowed resources normally merge on their primary key. With
+replace_windows each window is loaded as a partition instead: every item is
+kept only by the window its day falls in (partition_day), tagged with the
+window in WINDOW_COLUMN, and the resource merges with that column as merge
+key (replace_by_window), so dlt's delete-insert replaces the whole window
+partition in one transaction. The primary key is kept, so a campaign whose
+day moves to another window is not loaded twice. A window that comes back
+empty keeps its previous rows until a full reload.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import dlt
+
+DEFAULT_WINDOW_DAYS = 30
+DEFAULT_WINDOW_WORKERS = 4
+
+# Window partition key column of resources loaded with replace_windows
+WINDOW_COLUMN = "_window"
+
+# Resource state key of the windows the last run failed: {window key: error}
+FAILED_WINDOWS_KEY = 'failed_windows'
+
+# fetch_window(date_from, date_to) -> the window's items
+FetchWindow = Callable[[date, date], List[Dict[str, Any]]]
+
+# partition_day(item) -> the day the item's window partition is chosen by
+PartitionDay = Callable[[Dict[str, Any]], Optional[date]]
+
+# is_open(item) -> True while the item can still change
+IsOpen = Callable[[Dict[str, Any]], bool]
+
+
+def parse_date(value: Union[str, date, None], default: Optional[date] = None) -> Optional[date]:
+    """A YYYY-MM-DD string (or date) as a date; default when empty"""
+    if not value:
+        return default
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def date_windows(start: date, end: date, window_days: int) -> Iterator[Tuple[date, date]]:
+    """Consecutive, non-overlapping inclusive (from, to) windows covering start..end"""
+    if window_days < 1:
+        raise ValueError(f"window_days must be at least 1, got {window_days}")
+
+    window_start = start
+    while window_start <= end:
+        window_end = min(window_start + timedelta(days=window_days - 1), end)
+        yield window_start, window_end
+        window_start = window_end + timedelta(days=1)
+
+
+def _window_key(date_from: date, date_to: date) -> str:
+    return f"{date_from.isoformat()}/{date_to.isoformat()}"
+
+
+def _window_partition(
+    items: List[Dict[str, Any]],
+    window: Tuple[date, date],
+    start: date,
+    partition_day: PartitionDay
+) -> List[Dict[str, Any]]:
+    """The items of a window's partition, tagged with WINDOW_COLUMN"""
+    date_from, date_to = window
+    key = _window_key(date_from, date_to)
+    partition = []
+    for item in items:
+        day = partition_day(item)
+        if day is None or day < start:
+            day = start
+        if date_from <= day <= date_to:
+            item[WINDOW_COLUMN] = key
+            partition.append(item)
+    return partition
+
+
+def replace_by_window(resource):
+    """
+    Load a windowed resource by replacing its window partitions (merge key WINDOW_COLUMN)
+
+    The column is declared nullable: a merge key is NOT NULL by default,
+    and a NOT NULL column cannot be added to a table that already holds
+    rows merged without it.
+    """
+    resource.apply_hints(
+        merge_key=WINDOW_COLUMN,
+        columns={WINDOW_COLUMN: {'name': WINDOW_COLUMN, 'data_type': 'text', 'nullable': True, 'merge_key': True}}
+    )
+    return resource
+
+
+def fetch_windows(
+    fetch_window: FetchWindow,
+    start_date: Union[str, date],
+    end_date: Union[str, date, None] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    max_workers: int = DEFAULT_WINDOW_WORKERS,
+    primary_key: Union[str, Sequence[str], None] = None,
+    partition_day: Optional[PartitionDay] = None,
+    is_open: Optional[IsOpen] = None,
+    refetch_days: int = 0
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Fetch a date range window by window, concurrently
+
+    Must run inside a dlt resource: checkpoints are kept in its state.
+
+    Args:
+        fetch_window: Fetches one window's items; runs in worker threads
+        start_date: First day of the range (YYYY-MM-DD)
+        end_date: Last day of the range (default: today)
+        window_days: Days covered by one request
+        max_workers: Windows fetched at the same time
+        primary_key: Key field(s) items are merged on across windows
+        partition_day: Load each window as a partition: keep only the
+            items whose day falls in the window (unknown days and days
+            before the range count in the first window) and tag them with
+            WINDOW_COLUMN. Items are not merged across windows then.
+        is_open: Tells items that can still change; a window that yielded
+            one is not checkpointed
+        refetch_days: Fetch the windows ending less than this many days
+            before today again on every run
+
+    Yields:
+        Each window's items not already yielded for an earlier window, in
+        completion order. Raises only if every pending window failed.
+    """
+    today = date.today()
+    start = parse_date(start_date)
+    end = parse_date(end_date, today)
+    # Windows ending on or after this day can still change
+    settled_before = today - timedelta(days=max(0, refetch_days))
+
+    resource_state = dlt.current.resource_state()
+    resource_state.pop(FAILED_WINDOWS_KEY, None)
+    checkpoints = resource_state.setdefault('completed_windows', [])
+    done = set(checkpoints)
+    pending = [
+        window for window in date_windows(start, end, window_days)
+        if _window_key(*window) not in done or window[1] >= settled_before
+    ]
+    if not pending:
+        return
+
+    key_fields = [primary_key] if isinstance(primary_key, str) else list(primary_key or [])
+    seen = set()
+    failed: List[Tuple[str, Exception]] = []
+    windows = iter(pending)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="date-window") as executor:
+        # Keep at most max_workers windows in flight so finished but
+        # unconsumed windows never pile up in memory
+        in_flight = {}
+        for window in windows:
+            in_flight[executor.submit(fetch_window, *window)] = window
+            if len(in_flight) >= max_workers:
+                break
+
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                window = in_flight.pop(future)
+                for next_window in windows:
+                    in_flight[executor.submit(fetch_window, *next_window)] = next_window
+                    break
+
+                try:
+                    items = future.result()
+                except Exception as e:
+                    failed.append((_window_key(*window), e))
+                    continue
+
+                if partition_day:
+                    items = _window_partition(items, window, start, partition_day)
+                elif key_fields:
+                    fresh = []
+                    for item in items:
+                        key = tuple(item.get(field) for field in key_fields)
+                        if key not in seen:
+                            seen.add(key)
+                            fresh.append(item)
+                    items = fresh
+                if items:
+                    yield items
+
+                # The window containing today, a recent one or one holding
+                # items that are not final yet can still change
+                key = _window_key(*window)
+                if (window[1] < settled_before and key not in done
+                        and not (is_open and any(is_open(item) for item in items))):
+                    checkpoints.append(key)
+
+    if failed:
+        if len(failed) == len(pending):
+            raise failed[0][1]
+        for key, error in failed:
+            print(f"   ⚠️  Window {key} failed, retried on the next run: {error}")
+        resource_state[FAILED_WINDOWS_KEY] = {key: str(error) for key, error in failed}
+
+
+def failed_windows(source_state: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Resources of a source whose last fetch_windows left windows unfetched
+
+    Args:
+        source_state: The source's pipeline state (pipeline.state['sources'][name])
+
+    Returns:
+        {resource name: the failed windows and their errors}
+    """
+    return {
+        name: "; ".join(
+            f"window {key} failed: {error}" for key, error in resource_state[FAILED_WINDOWS_KEY].items()
+        )
+        for name, resource_state in source_state.get('resources', {}).items()
+        if resource_state.get(FAILED_WINDOWS_KEY)
+    }
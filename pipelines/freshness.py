@@ -0,0 +1,133 @@
+"""
+Source Freshness Catalog
+
+Tracks, per source, which dlt load last refreshed it and how many rows it
+holds, in marketing_data._source_freshness. The pipeline writes one row per
+source right after that source's load (next to its unified_campaigns
+partition); the agent reads the catalog joined with _dlt_loads instead of
+using the DuckDB file mtime and counting every table on every question.
+
+Each source has its own freshness SLA, so a question about TikTok only
+refreshes TikTok when TikTok itself is stale.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+FRESHNESS_TABLE = "_source_freshness"
+
+# How old each source may get before it counts as stale (seconds).
+# Seznam is slow and rate limited; budget approvals change daily at most.
+DEFAULT_FRESHNESS_SLA = {
+    'meta': 3600,
+    'google': 3600,
+    'tiktok': 3600,
+    'seznam': 6 * 3600,
+    'soap': 24 * 3600,
+}
+
+
+def load_freshness_sla() -> Dict[str, int]:
+    """
+    Freshness SLA per source, overridable via FRESHNESS_SLA
+
+    Example: FRESHNESS_SLA="tiktok=600,seznam=43200"
+    """
+    sla = dict(DEFAULT_FRESHNESS_SLA)
+    for item in os.getenv("FRESHNESS_SLA", "").split(","):
+        if "=" in item:
+            source, seconds = item.split("=", 1)
+            sla[source.strip()] = int(seconds)
+    return sla
+
+
+def record_source_refresh(
+    client,
+    source: str,
+    load_id: Optional[str],
+    row_count: int,
+    complete: bool = True
+):
+    """
+    Record that a source was just loaded
+
+    A partial load (complete=False: an extraction stopped at a failed page,
+    to be resumed by the next run) is not recorded: the source keeps the
+    time of its last complete refresh, so it stays stale until a run
+    completes it.
+
+    Args:
+        client: dlt sql client (inside the caller's transaction)
+        source: Source name ('meta', 'google', ...)
+        load_id: dlt load id of the load that refreshed it, if any
+        row_count: Rows the source now holds
+        complete: The load fetched everything the source had to fetch
+    """
+    if not complete:
+        return
+
+    table = f"{client.dataset_name}.{FRESHNESS_TABLE}"
+    client.execute_sql(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            source VARCHAR PRIMARY KEY,
+            load_id VARCHAR,
+            row_count BIGINT,
+            refreshed_at TIMESTAMP WITH TIME ZONE
+        )
+    """)
+    client.execute_sql(f"DELETE FROM {table} WHERE source = ?", source)
+    client.execute_sql(
+        f"INSERT INTO {table} VALUES (?, ?, ?, now())",
+        source,
+        load_id,
+        row_count,
+    )
+
+
+def read_freshness_catalog(conn, dataset: str = "marketing_data") -> Dict[str, Dict[str, Any]]:
+    """
+    Read the per-source freshness catalog
+
+    The load's commit time comes from _dlt_loads when the load id is known;
+    otherwise the time the catalog row was written.
+
+    Returns:
+        {source: {'load_id': str | None, 'row_count': int, 'last_updated': datetime}}
+    """
+    rows = conn.execute(f"""
+        SELECT
+            f.source,
+            f.load_id,
+            f.row_count,
+            epoch(COALESCE(l.inserted_at, f.refreshed_at)) AS last_updated
+        FROM {dataset}.{FRESHNESS_TABLE} f
+        LEFT JOIN {dataset}._dlt_loads l
+            ON l.load_id = f.load_id AND l.status = 0
+    """).fetchall()
+
+    return {
+        source: {
+            'load_id': load_id,
+            'row_count': row_count,
+            'last_updated': datetime.fromtimestamp(last_updated),
+        }
+        for source, load_id, row_count, last_updated in rows
+    }
+
+
+def stale_sources(
+    catalog: Dict[str, Dict[str, Any]],
+    sources: List[str],
+    sla: Dict[str, int],
+    now: Optional[datetime] = None
+) -> List[str]:
+    """Sources that were never loaded or are older than their SLA"""
+    now = now or datetime.now()
+    stale = []
+    for source in sources:
+        entry = catalog.get(source)
+        max_age = timedelta(seconds=sla.get(source, DEFAULT_FRESHNESS_SLA.get(source, 3600)))
+        if entry is None or now - entry['last_updated'] > max_age:
+            stale.append(source)
+    return stale
@@ -0,0 +1,161 @@
+"""
+HTTP Response Cache Module
+
+Content-addressed record/replay cache for the pooled HTTP sessions:
+- record: requests go to the APIs as usual and every successful response
+  is also written to disk
+- replay: responses are served from disk (and kept in memory), no server
+  is contacted; a request that was never recorded raises ResponseCacheMiss
+
+Keys hash the method, URL, sorted query params and body, so the same
+request always maps to the same file. Because every source and generated
+driver sends through http_session.session_for, replaying covers the whole
+pipeline: normalization and the unified view can be re-run without the
+mocks, at memory speed and with deterministic input for benchmarks.
+
+Rate limited (429) and server error responses are never recorded.
+Select the mode with HTTP_CACHE=record|replay (directory: HTTP_CACHE_DIR)
+or set_response_cache().
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+HTTP_CACHE_MODES = ('record', 'replay')
+
+# "" disables the cache
+HTTP_CACHE_MODE = os.getenv("HTTP_CACHE", "")
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", str(Path(__file__).parent / ".http_cache"))
+
+
+class ResponseCacheMiss(Exception):
+    """A request made in replay mode was never recorded"""
+
+
+def request_cache_key(request: requests.PreparedRequest) -> str:
+    """Content address of a request: method, URL, sorted params and body"""
+    scheme, netloc, path, query, _ = urlsplit(request.url)
+    params = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+
+    digest = hashlib.sha256()
+    digest.update(request.method.upper().encode("utf-8"))
+    digest.update(b"\0" + urlunsplit((scheme, netloc, path, params, "")).encode("utf-8"))
+    digest.update(b"\0" + body)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk response store, one JSON file per request key
+
+    Thread-safe: concurrent sources and enrichment threads record and
+    replay through one instance.
+    """
+
+    def __init__(self, mode: str, directory: Path = Path(HTTP_CACHE_DIR)):
+        if mode not in HTTP_CACHE_MODES:
+            raise ValueError(f"Unknown HTTP cache mode: {mode}. Available: {list(HTTP_CACHE_MODES)}")
+        self.mode = mode
+        self.directory = Path(directory)
+        self.hits = 0
+        self.recorded = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def replay(self, request: requests.PreparedRequest) -> requests.Response:
+        """The recorded response for a request"""
+        key = request_cache_key(request)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            path = self._path(key)
+            if not path.exists():
+                raise ResponseCacheMiss(f"No recorded response for {request.method} {request.url}")
+            entry = json.loads(path.read_text())
+            with self._lock:
+                self._entries[key] = entry
+
+        with self._lock:
+            self.hits += 1
+        return self._build_response(entry, request)
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response):
+        """Store a live response (successful ones only)"""
+        if response.status_code == 429 or response.status_code >= 500:
+            return
+
+        key = request_cache_key(request)
+        entry = {
+            'method': request.method,
+            'url': request.url,
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'headers': dict(response.headers),
+            'encoding': response.encoding,
+            # Reading .content keeps it available to the caller
+            'content': base64.b64encode(response.content).decode("ascii"),
+        }
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent readers never see half a file
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(entry))
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._entries[key] = entry
+            self.recorded += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters, for logging"""
+        with self._lock:
+            return {'mode': self.mode, 'hits': self.hits, 'recorded': self.recorded}
+
+    @staticmethod
+    def _build_response(entry: Dict[str, Any], request: requests.PreparedRequest) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry['encoding']
+        response.url = request.url
+        response.request = request
+        response._content = base64.b64decode(entry['content'])
+        response._content_consumed = True
+        return response
+
+
+_active_cache: Optional[ResponseCache] = ResponseCache(HTTP_CACHE_MODE) if HTTP_CACHE_MODE else None
+
+
+def set_response_cache(mode: Optional[str], directory: Optional[Path] = None) -> Optional[ResponseCache]:
+    """
+    Switch every pooled session to record, replay or no caching (None)
+
+    Returns:
+        The active cache, or None when caching is off
+    """
+    global _active_cache
+    _active_cache = ResponseCache(mode, directory or Path(HTTP_CACHE_DIR)) if mode else None
+    return _active_cache
+
+
+def response_cache() -> Optional[ResponseCache]:
+    """The active response cache, if any"""
+    return _active_cache
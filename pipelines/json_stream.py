@@ -0,0 +1,272 @@
+"""
+Streaming JSON Decoding
+
+response.json() holds the whole body text and the fully decoded document
+in memory before the first row can be yielded. iter_json_items reads the
+body chunk by chunk instead and decodes the array at a data selector
+('$', 'campaigns', 'data.campaigns', ...) one element at a time, so peak
+memory stays around one chunk plus one item however large the page is.
+
+Values outside the selected array (status, pagination, ...) are small and
+collected into an optional `document` dict while streaming. Elements are
+decoded with the stdlib json C scanner; no extra dependency is needed.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import dlt
+
+from http_session import session_for
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Items per yielded batch: dlt handles lists far faster than single items
+DEFAULT_BATCH_SIZE = 500
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Characters that may continue a number ("0" in "0.5", "1" in "1e3")
+_NUMBER_CHARS = re.compile(r'[0-9eE.+\-]*')
+
+
+class _JsonReader:
+    """Incremental reader over JSON text arriving in chunks"""
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; False at the end of input"""
+        if self.eof:
+            return False
+
+        # Drop the text already consumed
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self.buffer += text
+                return True
+
+        self.buffer += self._utf8.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill() and self.pos >= len(self.buffer):
+                raise ValueError("Unexpected end of JSON input")
+
+    def next(self) -> str:
+        """Consume the next non-whitespace character"""
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def expect(self, expected: str):
+        char = self.next()
+        if char != expected:
+            raise ValueError(f"Expected '{expected}' in JSON input, got '{char}'")
+
+    def value(self) -> Any:
+        """Decode one complete value, reading more chunks until it is whole"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+                # A number running to the end of the buffer may continue in the next chunk
+                number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                if self.eof or not (number and _NUMBER_CHARS.match(self.buffer, end).end() == len(self.buffer)):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def finish(self):
+        """Read the rest of the input, which may only be whitespace"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                raise ValueError("Unexpected data after JSON document")
+            if not self._fill() and self.pos >= len(self.buffer):
+                return
+
+    def items_at(self, path: List[str], holder: Dict[str, Any]) -> Iterator[Any]:
+        """Yield the elements at `path`, storing sibling values in holder"""
+        if not path:
+            if self.peek() != '[':
+                # Not an array: the value itself is the only item
+                yield self.value()
+                return
+
+            self.expect('[')
+            if self.peek() == ']':
+                self.pos += 1
+                return
+            while True:
+                yield self.value()
+                char = self.next()
+                if char == ']':
+                    return
+                if char != ',':
+                    raise ValueError(f"Expected ',' or ']' in JSON array, got '{char}'")
+
+        if path[0] == '*':
+            # Every element of an array: the selector continues in each one;
+            # values beside it are dropped so memory stays flat
+            self.expect('[')
+            if self.peek() == ']':
+                self.pos += 1
+                return
+            while True:
+                yield from self.items_at(path[1:], {})
+                char = self.next()
+                if char == ']':
+                    return
+                if char != ',':
+                    raise ValueError(f"Expected ',' or ']' in JSON array, got '{char}'")
+
+        if self.peek() != '{':
+            raise ValueError(f"Expected an object at '{path[0]}' in JSON input")
+
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            if key == path[0]:
+                child: Dict[str, Any] = {}
+                yield from self.items_at(path[1:], child)
+                if len(path) > 1:
+                    holder[key] = child
+            else:
+                holder[key] = self.value()
+
+            char = self.next()
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' in JSON object, got '{char}'")
+
+
+def iter_json_items(
+    chunks: Iterable[Union[bytes, str]],
+    data_selector: str = '$',
+    document: Optional[Dict[str, Any]] = None
+) -> Iterator[Any]:
+    """
+    Yield the elements of the array at data_selector as they are decoded
+
+    Args:
+        chunks: JSON text in pieces, e.g. response.iter_content(...)
+        data_selector: Dotted path of the array ('$' for the top level);
+            '*' steps into every element of an array, e.g. '*.results'
+            for the arrays inside a stream of batch objects
+        document: Optional dict that receives every value outside the
+            selected array (complete once iteration finishes; values
+            inside a '*' array are not collected)
+
+    Yields:
+        Array elements, in order. A selector that points at an object
+        yields that object; a missing selector yields nothing.
+    """
+    path = [part for part in data_selector.lstrip('$').replace('[*]', '.*').split('.') if part]
+    reader = _JsonReader(chunks)
+    yield from reader.items_at(path, document if document is not None else {})
+    # Consume the tail so the connection can go back to the pool
+    reader.finish()
+
+
+def iter_response_items(
+    response,
+    data_selector: str = '$',
+    document: Optional[Dict[str, Any]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Any]:
+    """iter_json_items over a requests response (sent with stream=True)"""
+    with response:
+        yield from iter_json_items(response.iter_content(chunk_size=chunk_size), data_selector, document)
+
+
+def batched(items: Iterable[Any], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Any]]:
+    """Group items into lists of up to batch_size"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def streaming_rest_resources(config: Dict[str, Any]) -> List[Any]:
+    """
+    Streaming equivalents of rest_api_resources(config)
+
+    Supports the subset of RESTAPIConfig the single-page sources use:
+    client base_url / headers / session, resource_defaults primary_key /
+    write_disposition, and per resource an endpoint path, params (at most
+    one of type "incremental") and data_selector. Resource names, table
+    hints and incremental state match the rest_api resources, so either
+    mode can load into the same tables.
+    """
+    client = config["client"]
+    base_url = client["base_url"].rstrip("/")
+    session = client.get("session") or session_for(base_url)
+
+    defaults = config.get("resource_defaults", {})
+    return [
+        _streaming_resource(resource, defaults, base_url, client.get("headers"), session)
+        for resource in config["resources"]
+    ]
+
+
+def _streaming_resource(resource: Dict[str, Any], defaults: Dict[str, Any], base_url: str, headers, session):
+    endpoint = resource["endpoint"]
+    if endpoint.get("paginator"):
+        raise ValueError(f"Streaming does not support paginated endpoints ({resource['name']})")
+
+    url = f"{base_url}/{endpoint['path'].lstrip('/')}"
+    data_selector = endpoint.get("data_selector", "$")
+
+    params, cursor_param, cursor = {}, None, None
+    for name, value in endpoint.get("params", {}).items():
+        if isinstance(value, dict) and value.get("type") == "incremental":
+            cursor_param = name
+            cursor = dlt.sources.incremental(value["cursor_path"], initial_value=value.get("initial_value"))
+        else:
+            params[name] = value
+
+    def fetch(incremental=cursor):
+        query = dict(params)
+        if cursor_param:
+            query[cursor_param] = incremental.start_value
+
+        response = session.get(url, params=query, headers=headers, stream=True)
+        response.raise_for_status()
+        yield from batched(iter_response_items(response, data_selector))
+
+    return dlt.resource(
+        fetch,
+        name=resource["name"],
+        primary_key=resource.get("primary_key", defaults.get("primary_key")),
+        write_disposition=resource.get("write_disposition", defaults.get("write_disposition")),
+    )()
@@ -0,0 +1,246 @@
+"""
+Pipeline Metrics Module
+
+Per-source throughput metrics for every pipeline run, from three places:
+- The shared HTTP layer (http_session.py): requests, errors, latency
+  histogram and body bytes, counted per API host
+- The sources: pages and rows as they are yielded
+- dlt's trace / load info: extract, normalize and load durations
+
+After each run the pipeline writes them to METRICS_DIR:
+- pipeline_metrics.json: the last HISTORY_RUNS runs and the sources whose
+  throughput regressed against their earlier runs
+- pipeline_metrics.prom: the last run in Prometheus text format (for the
+  node_exporter textfile collector)
+
+The agent's check_data_status and the backend's /api/status read the JSON
+file, so throughput regressions show up without scraping logs.
+"""
+
+import json
+import os
+import statistics
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_DIR = os.getenv("PIPELINE_METRICS_DIR", str(Path(__file__).parent / "metrics"))
+METRICS_JSON = "pipeline_metrics.json"
+METRICS_PROM = "pipeline_metrics.prom"
+
+# Runs kept in the JSON file
+HISTORY_RUNS = 20
+
+# A source regressed when its rows/s falls below this share of its median
+# over the earlier runs that loaded rows
+REGRESSION_RATIO = 0.5
+
+
+class HostStats:
+    """HTTP counters of one API host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'bytes': self.bytes,
+            'latency_sum': self.latency_sum,
+            'latency_buckets': list(self.latency_buckets),
+        }
+
+
+_hosts: Dict[str, HostStats] = {}
+_hosts_lock = threading.Lock()
+
+
+def _host_stats(host: str) -> HostStats:
+    if host not in _hosts:
+        _hosts[host] = HostStats()
+    return _hosts[host]
+
+
+def record_http_request(host: str, latency: float, status_code: int):
+    """Count one request to host (latency until the response headers)"""
+    with _hosts_lock:
+        stats = _host_stats(host)
+        stats.requests += 1
+        if status_code >= 400:
+            stats.errors += 1
+        stats.latency_sum += latency
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                stats.latency_buckets[index] += 1
+                break
+
+
+def record_http_bytes(host: str, size: int):
+    """Count response body bytes read from host"""
+    with _hosts_lock:
+        _host_stats(host).bytes += size
+
+
+def http_snapshot(host: str) -> Dict[str, Any]:
+    """Current counters of host (all zero if it was never requested)"""
+    with _hosts_lock:
+        return _hosts[host].snapshot() if host in _hosts else HostStats().snapshot()
+
+
+def http_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    HTTP metrics between two snapshots of a host
+
+    Returns:
+        {'requests', 'errors', 'bytes', 'latency': {'sum', 'count',
+        'buckets': {upper bound: cumulative count, '+Inf': count}}}
+    """
+    counts = [a - b for a, b in zip(after['latency_buckets'], before['latency_buckets'])]
+    requests = after['requests'] - before['requests']
+
+    buckets, cumulative = {}, 0
+    for bound, count in zip(LATENCY_BUCKETS, counts):
+        cumulative += count
+        buckets[str(bound)] = cumulative
+    buckets['+Inf'] = requests
+
+    return {
+        'requests': requests,
+        'errors': after['errors'] - before['errors'],
+        'bytes': after['bytes'] - before['bytes'],
+        'latency': {
+            'sum': round(after['latency_sum'] - before['latency_sum'], 6),
+            'count': requests,
+            'buckets': buckets,
+        },
+    }
+
+
+def throughput_regressions(runs: List[Dict[str, Any]], ratio: float = REGRESSION_RATIO) -> List[Dict[str, Any]]:
+    """
+    Sources of the last run whose rows/s fell below ratio x their median
+
+    Only runs that loaded rows count: an incremental run with nothing new
+    says nothing about throughput.
+
+    Returns:
+        [{'source', 'rows_per_second', 'baseline_rows_per_second'}, ...]
+    """
+    if len(runs) < 2:
+        return []
+
+    regressions = []
+    for source, metrics in runs[-1].get('sources', {}).items():
+        current = metrics.get('rows_per_second')
+        if not current:
+            continue
+        baseline = [
+            run['sources'][source]['rows_per_second']
+            for run in runs[:-1]
+            if run.get('sources', {}).get(source, {}).get('rows_per_second')
+        ]
+        if baseline and current < ratio * statistics.median(baseline):
+            regressions.append({
+                'source': source,
+                'rows_per_second': current,
+                'baseline_rows_per_second': round(statistics.median(baseline), 1),
+            })
+    return regressions
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels.items()) + "}"
+
+
+def prometheus_text(run: Dict[str, Any]) -> str:
+    """A run's metrics in Prometheus text exposition format"""
+    gauges = [
+        ('pipeline_source_up', "1 if the source loaded in the last run, 0 if it failed or loaded partially",
+         lambda m: 1 if m['status'] == 'loaded' else 0),
+        ('pipeline_http_requests', "HTTP requests sent in the last run", lambda m: m['http']['requests']),
+        ('pipeline_http_errors', "HTTP responses with status >= 400 in the last run", lambda m: m['http']['errors']),
+        ('pipeline_http_response_bytes', "Response body bytes read in the last run", lambda m: m['http']['bytes']),
+        ('pipeline_pages', "Pages yielded by the source in the last run", lambda m: m['pages']),
+        ('pipeline_rows', "Rows extracted in the last run", lambda m: m['rows']),
+        ('pipeline_rows_per_second', "Rows per second of the last run", lambda m: m['rows_per_second'] or 0),
+    ]
+    sources = run['sources']
+
+    lines = []
+    for name, help_text, value in gauges:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        lines += [f"{name}{_labels(source=source)} {value(m)}" for source, m in sources.items()]
+
+    name = 'pipeline_step_duration_seconds'
+    lines += [f"# HELP {name} Duration of each step of the last run", f"# TYPE {name} gauge"]
+    for source, m in sources.items():
+        lines += [
+            f"{name}{_labels(source=source, step=step)} {seconds}"
+            for step, seconds in m['durations'].items()
+        ]
+
+    name = 'pipeline_http_request_duration_seconds'
+    lines += [f"# HELP {name} HTTP request latency in the last run", f"# TYPE {name} histogram"]
+    for source, m in sources.items():
+        latency = m['http']['latency']
+        lines += [
+            f"{name}_bucket{_labels(source=source, le=bound)} {count}"
+            for bound, count in latency['buckets'].items()
+        ]
+        lines += [
+            f"{name}_sum{_labels(source=source)} {latency['sum']}",
+            f"{name}_count{_labels(source=source)} {latency['count']}",
+        ]
+
+    name = 'pipeline_last_run_timestamp_seconds'
+    lines += [f"# HELP {name} When the last run finished", f"# TYPE {name} gauge", f"{name} {run['finished_at']}"]
+    return "\n".join(lines) + "\n"
+
+
+def read_metrics(directory: str = METRICS_DIR) -> Optional[Dict[str, Any]]:
+    """The metrics JSON file ({'runs', 'regressions'}), or None before the first run"""
+    path = Path(directory) / METRICS_JSON
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def write_run_metrics(run: Dict[str, Any], directory: str = METRICS_DIR) -> Tuple[Path, Path]:
+    """
+    Append a run to the JSON history and rewrite the Prometheus file
+
+    Args:
+        run: {'finished_at' (Unix seconds), 'duration_s', 'sources':
+            {source: {'status', 'pages', 'rows', 'rows_per_second',
+            'durations', 'http'}}, ...}
+        directory: Where to write the files
+
+    Returns:
+        (JSON path, Prometheus path)
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    runs = (read_metrics(directory) or {}).get('runs', [])
+    runs = (runs + [run])[-HISTORY_RUNS:]
+
+    json_path = directory / METRICS_JSON
+    prom_path = directory / METRICS_PROM
+    # Write-then-rename so readers never see half a file
+    for path, text in (
+        (json_path, json.dumps({'runs': runs, 'regressions': throughput_regressions(runs)}, indent=2)),
+        (prom_path, prometheus_text(run)),
+    ):
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(text)
+        os.replace(tmp_path, path)
+
+    return json_path, prom_path
@@ -4,23 +4,356 @@ Nike Campaigns Unified Pipeline
 Extracts campaign data from all advertising platforms and creates unified view in DuckDB
 """
 
+import argparse
+import copy
+import inspect
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List
+from urllib.parse import urlparse
+
 import dlt
+from dlt.common.configuration.container import Container
+from dlt.common.pipeline import StateInjectableContext
 from sources import (
     meta_ads_source,
     google_ads_source,
     tiktok_ads_source,
     budget_approvals_source,
 )
-from sources.seznam_ads import seznam_campaigns
+from sources.seznam_ads import seznam_ads_source
+from date_windows import DEFAULT_WINDOW_DAYS, DEFAULT_WINDOW_WORKERS, failed_windows
+from http_cache import HTTP_CACHE_MODES, set_response_cache
+from metrics import http_delta, http_snapshot, write_run_metrics
+from pagination import interrupted_chains
+from performance import DEFAULT_PROFILE, PERFORMANCE_PROFILES, get_profile, performance_profile
+from unified import UNIFIED_TABLE, refresh_unified_partition
+
+
+# Sources in load order: name -> (description, label, dlt source factory, table name)
+# Seznam goes last: its per-campaign enrichment is slow and rate limited.
+PIPELINE_SOURCES = {
+    'meta': ("Meta Ad Library campaigns", "Meta", meta_ads_source, "meta_campaigns"),
+    'google': ("Google Ads campaigns", "Google", google_ads_source, "google_campaigns"),
+    'tiktok': ("TikTok Ads campaigns", "TikTok", tiktok_ads_source, "tiktok_campaigns"),
+    'soap': ("budget approvals", "Budget", budget_approvals_source, "budget_approvals"),
+    'seznam': ("Seznam Ads campaigns", "Seznam", seznam_ads_source, "seznam_campaigns"),
+}
+
+# Sources whose APIs filter by date range, so they can be fetched by date window
+WINDOWED_SOURCES = ('google', 'tiktok', 'soap')
+
+
+def print_progress(event: Dict[str, Any]):
+    """Render pipeline progress events as the pipeline's console output"""
+    kind = event['event']
+    if kind == 'pipeline_started':
+        print("=" * 60)
+        print("NIKE CAMPAIGNS DATA PIPELINE")
+        print("=" * 60)
+        print()
+    elif kind == 'source_started':
+        print(f"📊 Loading {event['description']}...")
+    elif kind == 'rows_normalized':
+        print(f"   Normalized: {event['rows']} {event['source']} rows in {event['pages']} pages")
+    elif kind == 'load_committed':
+        if event['load_id']:
+            print(f"✅ {event['label']}: load {event['load_id']} committed")
+        else:
+            print(f"✅ {event['label']}: no new data")
+        print(f"   Unified: {event['unified_rows']} {event['source']} rows")
+        print()
+    elif kind == 'source_partial':
+        print(f"⚠️  {event['label']} loaded partially, the next run fetches the rest: {event['error']}")
+        print()
+    elif kind == 'source_failed':
+        print(f"❌ {event['label']} failed: {event['error']}")
+        print()
+    elif kind == 'pipeline_complete':
+        print("=" * 60)
+        if event['failed'] or event['partial']:
+            print(f"❌ PIPELINE COMPLETE WITH FAILURES: {', '.join(event['failed'] + event['partial'])}")
+        else:
+            print("✅ PIPELINE COMPLETE")
+        print("=" * 60)
+        print(f"📈 Metrics: {event['metrics_path']}")
+
+
+def _source_resources(dlt_source) -> List:
+    """Selected resources of a dlt source (or the resource itself)"""
+    if hasattr(dlt_source, 'selected_resources'):
+        return list(dlt_source.selected_resources.values())
+    return [dlt_source]
+
+
+def _source_host(source_factory) -> str:
+    """API host a source requests by default (where its HTTP metrics are counted)"""
+    base_url = inspect.signature(source_factory).parameters['base_url'].default
+    return urlparse(base_url).netloc
+
+
+def _prefetched_resource(resource, items: List[Any], state: Dict[str, Any] = None):
+    """
+    A resource with the same name and table hints, reading already fetched items
+
+    `state` is the resource state (incremental cursors) the fetch ended
+    with; it replaces the pipeline's resource state when the resource is
+    extracted (keys the fetch removed, like a finished resume checkpoint,
+    go too), so it is only persisted if the load goes through.
+    """
+    table_schema = resource.compute_table_schema()
+
+    def prefetched():
+        if state is not None:
+            resource_state = dlt.current.resource_state()
+            resource_state.clear()
+            resource_state.update(copy.deepcopy(state))
+        yield items
+
+    return dlt.resource(
+        prefetched(),
+        name=resource.name,
+        table_name=resource.table_name,
+        write_disposition=table_schema.get('write_disposition'),
+        columns=table_schema.get('columns'),
+        section=resource.section,
+    )
 
 
-def load_all_campaigns():
+def load_all_campaigns(
+    sources: List[str] = None,
+    on_progress: Callable[[Dict[str, Any]], None] = print_progress,
+    parallel: bool = False,
+    full_reload: bool = False,
+    stream: bool = False,
+    start_date: str = None,
+    end_date: str = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    window_workers: int = DEFAULT_WINDOW_WORKERS,
+    replace_windows: bool = False,
+    profile: str = None
+):
     """
     Load Nike campaigns from all sources into DuckDB
 
+    Sources load incrementally: the cursor of each source (e.g. TikTok's
+    modify_time, Seznam's updated) is kept in the dlt pipeline state, so a
+    refresh only fetches and merges what changed since the last run.
+    full_reload drops the selected sources' data and cursors first and
+    loads everything again.
+
+    With start_date, the windowed sources (WINDOWED_SOURCES) split
+    start_date..end_date into window_days windows and fetch up to
+    window_workers of them at once instead of making one request; closed
+    windows are checkpointed, so re-running a backfill only fetches the
+    windows still missing plus the current one. With replace_windows each
+    fetched window replaces its partition of the table (delete-insert on
+    the window, see date_windows) instead of being merged row by row.
+
+    Progress is reported as events passed to on_progress while the
+    pipeline runs; every event carries 'event' and 'elapsed_ms':
+        pipeline_started   {'sources', 'parallel', 'full_reload'}
+        source_started     {'source', 'label', 'description'}
+        pages_fetched      {'source', 'pages', 'rows'} (once per page)
+        rows_normalized    {'source', 'pages', 'rows'}
+        load_committed     {'source', 'label', 'load_id', 'unified_rows'}
+                           (load_id None: nothing new to load)
+        source_partial     {'source', 'label', 'error'} (after load_committed)
+        source_failed      {'source', 'label', 'error'}
+        pipeline_complete  {'loaded', 'partial', 'failed', 'metrics_path'}
+
+    A source is partial when one of its page chains stopped at a failed
+    page (pagination.resumable_pages) or some of its date windows failed
+    (date_windows.fetch_windows): what was fetched is loaded, but the
+    source is not marked fresh and the next run resumes at that page or
+    retries those windows. Partial sources are also listed in 'loaded'.
+
+    profile selects a performance profile (performance.py): the
+    intermediate file format (JSONL or Parquet), normalize / load workers
+    and writer buffer sizes used to normalize and load every source.
+
+    Per-source metrics (HTTP requests, latency histogram and bytes from
+    http_session, pages and rows, fetch / extract / normalize / load
+    durations from the dlt trace) are written after the run to
+    metrics.METRICS_DIR as JSON and Prometheus text.
+
+    In parallel mode every source is fetched concurrently in a thread pool
+    (they are independent HTTP APIs); each source is normalized and loaded
+    by this thread as soon as its fetch finishes, so the refresh takes
+    about as long as the slowest source. A failing source never stops the
+    others in either mode.
+
+    Args:
+        sources: Sources to load (default: all). Tables of other sources
+            are left untouched.
+        on_progress: Callback receiving each progress event (default:
+            print them). In parallel mode it is called from worker threads,
+            but never concurrently.
+        parallel: Fetch all sources concurrently
+        full_reload: Ignore incremental cursors and replace the selected
+            sources' data
+        stream: Decode API responses incrementally (json_stream) so
+            memory stays flat however large a response is
+        start_date: Fetch the windowed sources by date window from this
+            day (YYYY-MM-DD)
+        end_date: Last day of the windowed range (default: today)
+        window_days: Days covered by one windowed request
+        window_workers: Windows fetched concurrently per source
+        replace_windows: Load the windowed sources by replacing whole
+            date window partitions
+        profile: Performance profile (default: performance.DEFAULT_PROFILE)
+
     Returns:
-        Pipeline load info
+        The dlt pipeline (its last_trace holds the last source's load info)
     """
+    sources = sources or list(PIPELINE_SOURCES)
+    unknown = [source for source in sources if source not in PIPELINE_SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown source(s): {', '.join(unknown)}")
+
+    settings = get_profile(profile)
+    started = time.perf_counter()
+    emit_lock = threading.Lock()
+
+    def emit(event: str, **fields):
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        with emit_lock:
+            on_progress({'event': event, 'elapsed_ms': elapsed_ms, **fields})
+
+    def start_source(source: str):
+        """Create the dlt source, counting pages as the resources yield them"""
+        description, label, source_factory, _ = PIPELINE_SOURCES[source]
+        emit('source_started', source=source, label=label, description=description)
+        fetched[source] = {'pages': 0, 'rows': 0}
+        host = _source_host(source_factory)
+        measured[source] = {
+            'started': time.perf_counter(),
+            'host': host,
+            'http': http_snapshot(host),
+            'durations': {},
+        }
+
+        def count_page(page, meta=None):
+            # Runs once per page (or item) the resource yields, before dlt buffers it
+            fetched[source]['pages'] += 1
+            fetched[source]['rows'] += len(page) if isinstance(page, list) else 1
+            emit('pages_fetched', source=source, **fetched[source])
+            return page
+
+        options = {'stream': stream}
+        if start_date and source in WINDOWED_SOURCES:
+            options.update(
+                start_date=start_date,
+                end_date=end_date,
+                window_days=window_days,
+                max_workers=window_workers,
+                replace_windows=replace_windows
+            )
+        dlt_source = source_factory(**options)
+        for resource in _source_resources(dlt_source):
+            resource.add_step(count_page)
+        return dlt_source
+
+    def fetch_source(source: str, state: Dict[str, Any]):
+        """Fetch every page of a source into memory (runs in a worker thread)"""
+        # The pipeline state is not visible outside pipeline.run: incremental
+        # cursors read and advance this snapshot of it instead
+        with Container().injectable_context(StateInjectableContext(state=state)):
+            dlt_source = start_source(source)
+            fetched_resources = [
+                (resource, list(resource), resource.state)
+                for resource in _source_resources(dlt_source)
+            ]
+        measured[source]['durations']['fetch'] = round(time.perf_counter() - measured[source]['started'], 3)
+        return dlt_source, fetched_resources
+
+    def prefetched_source(dlt_source, fetched_resources: List):
+        """A fetched source reading its prefetched items (runs in the loading thread)"""
+        # dlt.resource() lazily imports pandas to inspect its data, which
+        # breaks when several worker threads do it at once
+        prefetched = [_prefetched_resource(*fetched) for fetched in fetched_resources]
+        if any(resource is dlt_source for resource, _, _ in fetched_resources):
+            return prefetched[0]
+        for resource in prefetched:
+            dlt_source.resources[resource.name] = resource
+        return dlt_source
+
+    def load_source(source: str, dlt_source):
+        """Normalize and load one source, then rewrite its unified partition"""
+        _, label, _, table_name = PIPELINE_SOURCES[source]
+        load_info = pipeline.run(
+            dlt_source,
+            table_name=table_name,
+            refresh="drop_data" if full_reload else None,
+            loader_file_format=settings['loader_file_format']
+        )
+        # Root table only: nested lists land in child tables, whose rows
+        # would inflate the count by however deeply each source nests
+        normalize_info = pipeline.last_trace.last_normalize_info
+        rows = normalize_info.row_counts.get(table_name, 0) if normalize_info else fetched[source]['rows']
+        emit('rows_normalized', source=source, pages=fetched[source]['pages'], rows=rows)
+
+        durations = measured[source]['durations']
+        for step in pipeline.last_trace.steps:
+            if step.step in ('extract', 'normalize', 'load') and step.finished_at:
+                durations[step.step] = round((step.finished_at - step.started_at).total_seconds(), 3)
+        measured[source]['rows'] = rows
+
+        source_state = pipeline.state.get('sources', {}).get(dlt_source.name, {})
+        interrupted = {**interrupted_chains(source_state), **failed_windows(source_state)}
+        error = "; ".join(f"{name}: {reason}" for name, reason in interrupted.items()) or None
+
+        unified_started = time.perf_counter()
+        unified_rows = refresh_unified_partition(
+            pipeline,
+            source,
+            load_info,
+            full=full_reload,
+            prune=bool(replace_windows and start_date and source in WINDOWED_SOURCES),
+            complete=not interrupted
+        )
+        durations['unified'] = round(time.perf_counter() - unified_started, 3)
+        finish_source(source, error, status='partial' if interrupted else 'loaded')
+        emit(
+            'load_committed',
+            source=source,
+            label=label,
+            load_id=load_info.loads_ids[-1] if load_info.loads_ids else None,
+            unified_rows=unified_rows
+        )
+        if interrupted:
+            emit('source_partial', source=source, label=label, error=error)
+            partial.append(source)
+
+    def fail_source(source: str, error: Exception):
+        # A package that failed to normalize or load would be retried by
+        # every later pipeline.run and fail the other sources too; its state
+        # is dropped with it, so the next run fetches the source again
+        if pipeline.has_pending_data:
+            pipeline.drop_pending_packages()
+        emit('source_failed', source=source, label=PIPELINE_SOURCES[source][1], error=str(error))
+        failed.append(source)
+        if source in measured:
+            finish_source(source, error, status='failed')
+
+    def finish_source(source: str, error: Any = None, status: str = 'loaded'):
+        """Close one source's metrics for the run's metrics files"""
+        entry = measured[source]
+        total = round(time.perf_counter() - entry['started'], 3)
+        rows = entry.get('rows', fetched[source]['rows'])
+        run_sources[source] = {
+            'status': status,
+            'error': str(error) if error else None,
+            'host': entry['host'],
+            'pages': fetched[source]['pages'],
+            'rows': rows,
+            'rows_per_second': round(rows / total, 1) if rows and total else None,
+            'durations': {**entry['durations'], 'total': total},
+            'http': http_delta(entry['http'], http_snapshot(entry['host'])),
+        }
+
     # Create pipeline
     pipeline = dlt.pipeline(
         pipeline_name="nike_campaigns",
@@ -29,78 +362,52 @@ def load_all_campaigns():
         dev_mode=False,  # Use stable schema name
     )
 
-    print("=" * 60)
-    print("NIKE CAMPAIGNS DATA PIPELINE")
-    print("=" * 60)
-    print()
-
-    # Load Meta Ads
-    print("📊 Loading Meta Ad Library campaigns...")
-    try:
-        meta_info = pipeline.run(
-            meta_ads_source(),
-            table_name="meta_campaigns",
-        )
-        print(f"✅ Meta: {meta_info}")
-    except Exception as e:
-        print(f"❌ Meta failed: {e}")
-
-    print()
-
-    # Load Google Ads
-    print("📊 Loading Google Ads campaigns...")
-    try:
-        google_info = pipeline.run(
-            google_ads_source(),
-            table_name="google_campaigns",
-        )
-        print(f"✅ Google: {google_info}")
-    except Exception as e:
-        print(f"❌ Google failed: {e}")
-
-    print()
-
-    # Load TikTok Ads
-    print("📊 Loading TikTok Ads campaigns...")
-    try:
-        tiktok_info = pipeline.run(
-            tiktok_ads_source(),
-            table_name="tiktok_campaigns",
-        )
-        print(f"✅ TikTok: {tiktok_info}")
-    except Exception as e:
-        print(f"❌ TikTok failed: {e}")
-
-    print()
-
-    # Load Budget Approvals
-    print("📊 Loading budget approvals...")
-    try:
-        budget_info = pipeline.run(
-            budget_approvals_source(),
-            table_name="budget_approvals",
-        )
-        print(f"✅ Budget: {budget_info}")
-    except Exception as e:
-        print(f"❌ Budget failed: {e}")
-
-    print()
-
-    # Load Seznam Ads (Complex API)
-    print("📊 Loading Seznam Ads campaigns...")
-    try:
-        seznam_info = pipeline.run(
-            seznam_campaigns(),
-            table_name="seznam_campaigns",
-        )
-        print(f"✅ Seznam: {seznam_info}")
-    except Exception as e:
-        print(f"❌ Seznam failed: {e}")
-
-    print()
-    print("=" * 60)
-    print("✅ PIPELINE COMPLETE")
-    print("=" * 60)
+    selected = [source for source in PIPELINE_SOURCES if source in sources]
+    fetched: Dict[str, Dict[str, int]] = {}
+    measured: Dict[str, Dict[str, Any]] = {}
+    run_sources: Dict[str, Dict[str, Any]] = {}
+    loaded, partial, failed = [], [], []
+
+    emit('pipeline_started', sources=selected, parallel=parallel, full_reload=full_reload)
+
+    with performance_profile(profile):
+        if parallel:
+            # A full reload fetches from the initial cursors
+            state = copy.deepcopy(pipeline.state)
+            if full_reload:
+                state['sources'] = {}
+
+            with ThreadPoolExecutor(max_workers=len(selected)) as executor:
+                futures = {
+                    executor.submit(fetch_source, source, copy.deepcopy(state)): source
+                    for source in selected
+                }
+                for future in as_completed(futures):
+                    source = futures[future]
+                    try:
+                        load_source(source, prefetched_source(*future.result()))
+                        loaded.append(source)
+                    except Exception as e:
+                        fail_source(source, e)
+        else:
+            for source in selected:
+                try:
+                    load_source(source, start_source(source))
+                    loaded.append(source)
+                except Exception as e:
+                    fail_source(source, e)
+
+    metrics_path, _ = write_run_metrics({
+        'finished_at': round(time.time(), 3),
+        'duration_s': round(time.perf_counter() - started, 3),
+        'parallel': parallel,
+        'full_reload': full_reload,
+        'stream': stream,
+        'profile': profile or DEFAULT_PROFILE,
+        'sources': run_sources,
+    })
+
+    emit('pipeline_complete', loaded=loaded, partial=partial, failed=failed, metrics_path=str(metrics_path))
 
     return pipeline
 
@@ -127,46 +434,9 @@ def query_top_campaigns(pipeline, limit: int = 20):
     # Connect to DuckDB
     conn = duckdb.connect(db_path)
 
-    # Query across all campaign tables
+    # Query the unified table: it exists as soon as any source has been
+    # loaded, even when only some sources were selected
     query = f"""
-    WITH all_campaigns AS (
-        -- Meta campaigns (no campaign name, use page_name)
-        SELECT
-            id as campaign_id,
-            page_name as campaign_name,
-            'Meta' as source,
-            'Facebook/Instagram' as channel,
-            CAST(spend__upper_bound AS DOUBLE) as budget,
-            ad_delivery_start_time as start_date,
-            ad_delivery_stop_time as end_date
-        FROM marketing_data.meta_campaigns
-
-        UNION ALL
-
-        -- Google campaigns
-        SELECT
-            id as campaign_id,
-            name as campaign_name,
-            'Google' as source,
-            channel,
-            CAST(budget_micros AS DOUBLE) / 1000000 as budget,
-            start_date::TIMESTAMP as start_date,
-            end_date::TIMESTAMP as end_date
-        FROM marketing_data.google_campaigns
-
-        UNION ALL
-
-        -- TikTok campaigns
-        SELECT
-            campaign_id,
-            campaign_name,
-            'TikTok' as source,
-            channel,
-            CAST(budget AS DOUBLE) as budget,
-            NULL as start_date,
-            NULL as end_date
-        FROM marketing_data.tiktok_campaigns
-    )
     SELECT
         campaign_id,
         campaign_name,
@@ -175,7 +445,7 @@ def query_top_campaigns(pipeline, limit: int = 20):
         budget,
         start_date,
         end_date
-    FROM all_campaigns
+    FROM marketing_data.{UNIFIED_TABLE}
     WHERE budget IS NOT NULL
     ORDER BY budget DESC
     LIMIT {limit}
@@ -193,8 +463,102 @@ def query_top_campaigns(pipeline, limit: int = 20):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nike campaigns data pipeline")
+    parser.add_argument(
+        "--sources",
+        help=f"comma-separated sources to load (default: all of {','.join(PIPELINE_SOURCES)})"
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="fetch all sources concurrently"
+    )
+    parser.add_argument(
+        "--full-reload",
+        action="store_true",
+        help="ignore incremental cursors and reload the selected sources from scratch"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="decode API responses incrementally instead of loading whole bodies"
+    )
+    parser.add_argument(
+        "--since",
+        metavar="YYYY-MM-DD",
+        help=f"backfill / refresh {', '.join(WINDOWED_SOURCES)} by date window from this day"
+    )
+    parser.add_argument(
+        "--until",
+        metavar="YYYY-MM-DD",
+        help="last day of the --since range (default: today)"
+    )
+    parser.add_argument(
+        "--window-days",
+        type=int,
+        default=DEFAULT_WINDOW_DAYS,
+        help=f"days per date window (default: {DEFAULT_WINDOW_DAYS})"
+    )
+    parser.add_argument(
+        "--window-workers",
+        type=int,
+        default=DEFAULT_WINDOW_WORKERS,
+        help=f"date windows fetched concurrently per source (default: {DEFAULT_WINDOW_WORKERS})"
+    )
+    parser.add_argument(
+        "--replace-windows",
+        action="store_true",
+        help="load the --since range by replacing whole date window partitions instead of merging rows"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(PERFORMANCE_PROFILES),
+        default=DEFAULT_PROFILE,
+        help=f"performance profile: file format and normalize/load workers (default: {DEFAULT_PROFILE}; "
+             "bulk for multi-million-row refreshes)"
+    )
+    parser.add_argument(
+        "--http-cache",
+        choices=HTTP_CACHE_MODES,
+        help="record API responses to disk, or replay them without contacting any server "
+             "(replay a recorded run with the same flags, e.g. --full-reload)"
+    )
+    args = parser.parse_args()
+
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()] if args.sources else None
+    unknown = [s for s in sources or [] if s not in PIPELINE_SOURCES]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)}")
+
+    if args.until and not args.since:
+        parser.error("--until requires --since")
+    if args.replace_windows and not args.since:
+        parser.error("--replace-windows requires --since")
+
+    if args.http_cache:
+        set_response_cache(args.http_cache)
+
+    failed_sources = []
+
+    def on_progress(event: Dict[str, Any]):
+        if event['event'] in ('source_failed', 'source_partial'):
+            failed_sources.append(event['source'])
+        print_progress(event)
+
     # Run pipeline
-    pipeline = load_all_campaigns()
+    pipeline = load_all_campaigns(
+        sources,
+        on_progress=on_progress,
+        parallel=args.parallel,
+        full_reload=args.full_reload,
+        stream=args.stream,
+        start_date=args.since,
+        end_date=args.until,
+        window_days=args.window_days,
+        window_workers=args.window_workers,
+        replace_windows=args.replace_windows,
+        profile=args.profile
+    )
 
     # Query results
     top_campaigns = query_top_campaigns(pipeline, limit=20)
@@ -209,3 +573,7 @@ if __name__ == "__main__":
     print("To explore data:")
     print("  duckdb nike_campaigns.duckdb")
     print()
+
+    # Scripts and schedulers must see a partial refresh as a failure
+    if failed_sources:
+        sys.exit(1)
@@ -0,0 +1,179 @@
+"""
+Pagination Helpers
+
+Cursor-paginated APIs only reveal the next cursor in the current page, so a
+plain loop waits for every page's items to be processed before it asks for
+the next one. prefetch_pages moves the fetch loop into a background thread
+that requests page N+1 as soon as page N's cursor is known, keeping a
+bounded number of pages ready while the caller works on earlier ones.
+
+resumable_pages adds checkpoints for long (cursor, page) chains: once a
+page's items have been handed to dlt, the next cursor and page number are
+kept in the resource state, which dlt commits together with those items.
+When a page fails (a 429 storm, a transient 5xx), the run stops there and
+loads what it has; the next run resumes from the checkpoint instead of
+page 1. The error is kept in the checkpoint, so the caller can report the
+load as partial (interrupted_chains). A checkpoint whose first page fails
+(e.g. an expired cursor) is dropped and the chain restarts from page 1.
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import dlt
+
+DEFAULT_LOOKAHEAD = 2
+
+# Resource state key of the resume checkpoint: {'cursor', 'page', 'error'}
+RESUME_KEY = 'resume_from'
+
+# fetch_page(state) -> (items, next state or None when the chain ends)
+FetchPage = Callable[[Any], Tuple[List[Any], Optional[Any]]]
+
+
+def prefetch_pages(fetch_page: FetchPage, start: Any = None, lookahead: int = DEFAULT_LOOKAHEAD) -> Iterator[List[Any]]:
+    """
+    Iterate the pages of a cursor-paginated API, fetching ahead
+
+    Args:
+        fetch_page: Fetches one page for a pagination state (cursor, page
+            number, ...) and returns (items, next_state); a next_state of
+            None ends the chain
+        start: Pagination state of the first page
+        lookahead: Fetched pages that may wait unconsumed; the fetch thread
+            pauses once this many are ready
+
+    Yields:
+        Each page's items, in order. A fetch error is raised here, after
+        the pages fetched before it.
+    """
+    for items, _ in _prefetch(fetch_page, start, lookahead):
+        yield items
+
+
+def resumable_pages(
+    fetch_page: FetchPage,
+    start: Tuple[Optional[str], int] = (None, 1),
+    lookahead: int = DEFAULT_LOOKAHEAD
+) -> Iterator[List[Any]]:
+    """
+    prefetch_pages for (cursor, page) chains, checkpointed in the resource state
+
+    Must run inside a dlt resource. Starts from the RESUME_KEY checkpoint
+    when an earlier run was interrupted, else from start. The checkpoint
+    moves to the next page once the caller asks for it (this page's items
+    are extracted) and is cleared when the chain ends.
+
+    A failing page ends the iteration normally, keeping the checkpoint
+    with the error, so the pages already extracted are loaded and the next
+    run retries from the failed page. If the resumed page fails before any
+    page is extracted, the checkpoint is dropped and the chain restarts
+    from start; only a failure of that first page is raised. Extra keys
+    the caller keeps in the checkpoint are preserved.
+
+    Yields:
+        Each page's items, in order
+    """
+    resource_state = dlt.current.resource_state()
+    checkpoint = resource_state.get(RESUME_KEY)
+    if checkpoint:
+        print(f"   ↪️  Resuming at page {checkpoint['page']}")
+        pages = _checkpointed_pages(fetch_page, (checkpoint['cursor'], checkpoint['page']), lookahead)
+        try:
+            items = next(pages)
+        except StopIteration:
+            return
+        except Exception as e:
+            # The failure state is not committed, so a bad checkpoint would
+            # fail every run: start the chain over instead
+            print(f"   ⚠️  Resuming at page {checkpoint['page']} failed, restarting from page {start[1]}: {e}")
+            resource_state.pop(RESUME_KEY, None)
+        else:
+            yield items
+            yield from pages
+            return
+
+    yield from _checkpointed_pages(fetch_page, start, lookahead)
+
+
+def interrupted_chains(source_state: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Resources of a source whose page chain stopped at a failed page
+
+    Args:
+        source_state: The source's pipeline state (pipeline.state['sources'][name])
+
+    Returns:
+        {resource name: error of the page the next run resumes at}
+    """
+    return {
+        name: resource_state[RESUME_KEY].get('error') or "interrupted"
+        for name, resource_state in source_state.get('resources', {}).items()
+        if resource_state.get(RESUME_KEY)
+    }
+
+
+def _checkpointed_pages(fetch_page: FetchPage, start: Tuple[Optional[str], int], lookahead: int) -> Iterator[List[Any]]:
+    """resumable_pages from a given (cursor, page), without the resume logic"""
+    resource_state = dlt.current.resource_state()
+    pages = 0
+    try:
+        for items, next_state in _prefetch(fetch_page, start, lookahead):
+            yield items
+            pages += 1
+            if next_state is None:
+                resource_state.pop(RESUME_KEY, None)
+            else:
+                cursor, page = next_state
+                checkpoint = resource_state.setdefault(RESUME_KEY, {})
+                checkpoint.update(cursor=cursor, page=page)
+                checkpoint.pop('error', None)
+    except Exception as e:
+        if not pages:
+            raise
+        checkpoint = resource_state[RESUME_KEY]
+        checkpoint['error'] = f"page {checkpoint['page']} failed: {e}"
+        print(f"   ⚠️  Page {checkpoint['page']} failed, the next run resumes there: {e}")
+
+
+def _prefetch(fetch_page: FetchPage, start: Any, lookahead: int) -> Iterator[Tuple[List[Any], Optional[Any]]]:
+    """prefetch_pages yielding (items, next_state) for each page"""
+    pages: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=max(1, lookahead))
+    stop = threading.Event()
+
+    def put(kind: str, value: Any) -> bool:
+        # Poll so an abandoned iterator never leaves the thread blocked
+        while not stop.is_set():
+            try:
+                pages.put((kind, value), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch_all():
+        state = start
+        try:
+            while not stop.is_set():
+                items, state = fetch_page(state)
+                if not put('page', (items, state)) or state is None:
+                    break
+            put('done', None)
+        except Exception as e:
+            put('error', e)
+
+    thread = threading.Thread(target=fetch_all, name="prefetch-pages", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            kind, value = pages.get()
+            if kind == 'page':
+                yield value
+            elif kind == 'error':
+                raise value
+            else:
+                return
+    finally:
+        stop.set()
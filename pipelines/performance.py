@@ -0,0 +1,109 @@
+"""
+Pipeline Performance Profiles
+
+A profile picks how dlt writes and processes a run's intermediate files:
+- loader_file_format: jsonl, or parquet (Arrow) — typed columnar files
+  are about twice as fast to normalize and load into DuckDB
+- normalize_workers: processes normalizing extracted files in parallel
+- load_workers: threads loading normalized files into DuckDB
+- buffer_max_items: items a writer buffers in memory before flushing
+- file_max_items: items per intermediate file; normalize spreads files
+  over its workers, so a multi-million-row source must be split into
+  several files to use more than one core
+
+Profiles (PIPELINE_PROFILE selects the default one):
+- default: changes nothing, so dlt's defaults (JSONL, one normalize
+  worker) or your own dlt config apply; plenty for the mock-sized loads
+  and needs no extra dependency
+- bulk: multi-million-row refreshes; Parquet intermediates, one normalize
+  worker per CPU and files of FILE_MAX_ITEMS items. Needs pyarrow
+  (dlt[parquet]).
+
+Measured on 300k synthetic Google campaign rows, one CPU (extract /
+normalize / load): jsonl 3.8s / 13.3s / 3.1s, parquet 3.8s / 7.0s / 1.9s.
+A larger buffer (50k items) made no difference. Extra normalize workers
+only pay off with several cores.
+
+A profile never overrides dlt settings you configured yourself
+(config.toml or environment): it only fills in the ones left unset, and
+only for the duration of the run.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+import dlt
+
+# Items per intermediate file in the bulk profile
+FILE_MAX_ITEMS = 100_000
+
+PERFORMANCE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # None leaves the setting to dlt
+    'default': {
+        'loader_file_format': None,
+        'normalize_workers': None,
+        'load_workers': None,
+        'buffer_max_items': None,
+        'file_max_items': None,
+    },
+    'bulk': {
+        'loader_file_format': 'parquet',
+        'normalize_workers': os.cpu_count() or 1,
+        # DuckDB takes one writer at a time: more threads only wait
+        'load_workers': 4,
+        'buffer_max_items': 5000,
+        'file_max_items': FILE_MAX_ITEMS,
+    },
+}
+
+DEFAULT_PROFILE = os.getenv("PIPELINE_PROFILE", "default")
+
+# Profile setting -> dlt config key
+_DLT_CONFIG = {
+    'normalize_workers': "normalize.workers",
+    'load_workers': "load.workers",
+    'buffer_max_items': "data_writer.buffer_max_items",
+    'file_max_items': "data_writer.file_max_items",
+}
+
+
+def get_profile(name: str = None) -> Dict[str, Any]:
+    """Settings of a performance profile (default: DEFAULT_PROFILE)"""
+    name = name or DEFAULT_PROFILE
+    if name not in PERFORMANCE_PROFILES:
+        raise ValueError(
+            f"Unknown performance profile: {name} (available: {', '.join(PERFORMANCE_PROFILES)})"
+        )
+    return PERFORMANCE_PROFILES[name]
+
+
+@contextmanager
+def performance_profile(name: str = None) -> Iterator[Dict[str, Any]]:
+    """
+    Apply a profile's dlt settings for the duration of a run
+
+    dlt reads worker counts and writer sizes from its config, so the ones
+    not configured already are set as environment variables and removed
+    afterwards. The loader file format is passed to pipeline.run (None
+    keeps dlt's configured format):
+
+        with performance_profile('bulk') as profile:
+            pipeline.run(source, loader_file_format=profile['loader_file_format'])
+
+    Yields:
+        The profile's settings
+    """
+    profile = get_profile(name)
+    applied = []
+    try:
+        for setting, config_key in _DLT_CONFIG.items():
+            if profile[setting] is None or dlt.config.get(config_key) is not None:
+                continue
+            key = config_key.upper().replace(".", "__")
+            os.environ[key] = str(profile[setting])
+            applied.append(key)
+        yield profile
+    finally:
+        for key in applied:
+            os.environ.pop(key, None)
@@ -4,7 +4,7 @@ Simple CLI to query Nike campaigns data
 Run the pipeline and answer questions about campaigns
 """
 
-import sys
+import argparse
 import dlt
 import duckdb
 from datetime import datetime
@@ -14,6 +14,16 @@ from sources import (
     tiktok_ads_source,
     budget_approvals_source,
 )
+from performance import DEFAULT_PROFILE, PERFORMANCE_PROFILES, performance_profile
+from unified import UNIFIED_TABLE, refresh_unified_partition
+
+# Unified partitions the query CLI answers from, with their display labels
+# (Seznam and budget approvals are answered by agent.py)
+QUERY_SOURCES = {
+    'meta': 'Meta',
+    'google': 'Google',
+    'tiktok': 'TikTok',
+}
 
 
 def print_header(text):
@@ -25,8 +35,14 @@ def print_header(text):
     print()
 
 
-def run_pipeline():
-    """Run the data extraction pipeline"""
+def run_pipeline(profile=None):
+    """
+    Run the data extraction pipeline
+
+    Args:
+        profile: Performance profile (performance.py; default: the
+            PIPELINE_PROFILE environment variable, else 'default')
+    """
     print_header("EXTRACTING NIKE CAMPAIGNS DATA")
 
     pipeline = dlt.pipeline(
@@ -37,19 +53,21 @@ def run_pipeline():
     )
 
     sources = [
-        ("Meta (Facebook/Instagram)", meta_ads_source),
-        ("Google Ads", google_ads_source),
-        ("TikTok Ads", tiktok_ads_source),
-        ("Budget Approvals", budget_approvals_source),
+        ("meta", "Meta (Facebook/Instagram)", meta_ads_source),
+        ("google", "Google Ads", google_ads_source),
+        ("tiktok", "TikTok Ads", tiktok_ads_source),
+        ("soap", "Budget Approvals", budget_approvals_source),
     ]
 
-    for name, source in sources:
-        print(f"📊 Extracting from {name}...", end=" ")
-        try:
-            pipeline.run(source())
-            print("✅")
-        except Exception as e:
-            print(f"❌ Error: {e}")
+    with performance_profile(profile) as settings:
+        for key, name, source in sources:
+            print(f"📊 Extracting from {name}...", end=" ")
+            try:
+                load_info = pipeline.run(source(), loader_file_format=settings['loader_file_format'])
+                refresh_unified_partition(pipeline, key, load_info)
+                print("✅")
+            except Exception as e:
+                print(f"❌ Error: {e}")
 
     return pipeline
 
@@ -67,56 +85,20 @@ def query_campaigns(query_text, limit=20):
     show_channel = any(word in query_lower for word in ["channel", "platform", "where"])
     show_budget = "budget" in query_lower or "spend" in query_lower or "cost" in query_lower
 
-    # Build query
+    # Rows are normalized once per load (unified.py), not per query
+    labels = " ".join(f"WHEN '{key}' THEN '{label}'" for key, label in QUERY_SOURCES.items())
+    sources = ", ".join(f"'{key}'" for key in QUERY_SOURCES)
     query = f"""
-    WITH all_campaigns AS (
-        SELECT
-            id as campaign_id,
-            page_name as campaign_name,
-            'Meta' as source,
-            'Facebook/Instagram' as channel,
-            CAST(spend__upper_bound AS DOUBLE) as budget,
-            CAST(impressions__upper_bound AS BIGINT) as impressions,
-            ad_delivery_start_time as start_date,
-            ad_delivery_stop_time as end_date
-        FROM marketing_data.meta_campaigns
-
-        UNION ALL
-
-        SELECT
-            id as campaign_id,
-            name as campaign_name,
-            'Google' as source,
-            channel,
-            CAST(budget_micros AS DOUBLE) / 1000000 as budget,
-            CAST(metrics__impressions AS BIGINT) as impressions,
-            start_date::TIMESTAMP as start_date,
-            end_date::TIMESTAMP as end_date
-        FROM marketing_data.google_campaigns
-
-        UNION ALL
-
-        SELECT
-            campaign_id,
-            campaign_name,
-            'TikTok' as source,
-            channel,
-            CAST(budget AS DOUBLE) as budget,
-            CAST(metrics__impressions AS BIGINT) as impressions,
-            NULL as start_date,
-            NULL as end_date
-        FROM marketing_data.tiktok_campaigns
-    )
     SELECT
         campaign_name,
-        source,
+        CASE source {labels} END as source,
         channel,
         '$' || ROUND(budget / 1000, 1) || 'K' as budget,
         impressions,
         start_date,
         end_date
-    FROM all_campaigns
-    WHERE budget IS NOT NULL
+    FROM marketing_data.{UNIFIED_TABLE}
+    WHERE source IN ({sources}) AND budget IS NOT NULL
     ORDER BY {"start_date DESC" if show_recent else "budget DESC"}
     LIMIT {limit}
     """
@@ -148,8 +130,8 @@ def format_results(df, query_text):
     print()
 
 
-def interactive_mode():
-    """Run in interactive mode"""
+def interactive_mode(profile=None):
+    """Run in interactive mode (profile: performance profile of refreshes)"""
     print_header("NIKE CAMPAIGNS QUERY INTERFACE")
     print("Ask questions about Nike campaigns!")
     print("Examples:")
@@ -173,7 +155,7 @@ def interactive_mode():
                 break
 
             if query.lower() == 'refresh':
-                run_pipeline()
+                run_pipeline(profile)
                 continue
 
             # Query the database
@@ -191,9 +173,19 @@ def interactive_mode():
 
 def main():
     """Main entry point"""
-    if len(sys.argv) > 1:
+    parser = argparse.ArgumentParser(description="Query Nike campaigns")
+    parser.add_argument("question", nargs="*", help="question to answer (default: interactive mode)")
+    parser.add_argument(
+        "--profile",
+        choices=list(PERFORMANCE_PROFILES),
+        default=DEFAULT_PROFILE,
+        help=f"performance profile of pipeline runs (default: {DEFAULT_PROFILE})"
+    )
+    args = parser.parse_args()
+
+    if args.question:
         # Command mode: query.py "your question"
-        query_text = " ".join(sys.argv[1:])
+        query_text = " ".join(args.question)
 
         print_header("NIKE CAMPAIGNS QUERY")
         print(f"Question: {query_text}")
@@ -202,7 +194,7 @@ def main():
         import os
         if not os.path.exists("nike_campaigns.duckdb"):
             print("\n📂 Database not found. Running pipeline first...")
-            run_pipeline()
+            run_pipeline(args.profile)
 
         # Query
         results = query_campaigns(query_text)
@@ -214,9 +206,9 @@ def main():
         import os
         if not os.path.exists("nike_campaigns.duckdb"):
             print("\n📂 Database not found. Running pipeline first...")
-            run_pipeline()
+            run_pipeline(args.profile)
 
-        interactive_mode()
+        interactive_mode(args.profile)
 
 
 if __name__ == "__main__":
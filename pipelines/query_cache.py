@@ -0,0 +1,191 @@
+"""
+Query Cache Module
+
+LRU + TTL cache for agent query results:
+- Keyed by the normalized intent from parse_query
+- Every entry remembers the data version it was computed against (the
+  latest dlt load in _dlt_loads); once a new load commits, the version
+  changes and older entries are treated as misses and dropped
+- Optionally persisted to a small SQLite file so separate CLI processes and
+  service workers share hits
+- Values are stored as JSON (dates and decimals as strings), never pickled,
+  so a tampered or stale cache file can at worst miss; every hit returns
+  the decoded JSON, from memory or disk alike
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "256"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+
+# On-disk store shared by CLI processes and service workers ("" disables it)
+QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH", str(Path(__file__).parent / "query_cache.sqlite"))
+
+
+def json_default(value: Any) -> Any:
+    """JSON encoder for values DuckDB hands back (timestamps, dates, decimals)"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def intent_cache_key(intent: Dict[str, Any]) -> str:
+    """Normalized cache key for the parts of an intent that shape the query"""
+    return json.dumps(
+        {
+            'sources': sorted(intent['sources']),
+            'filters': intent['filters'],
+            'limit': intent['limit'],
+        },
+        sort_keys=True
+    )
+
+
+class QueryCache:
+    def __init__(
+        self,
+        max_entries: int = QUERY_CACHE_SIZE,
+        ttl_seconds: float = QUERY_CACHE_TTL,
+        path: Optional[Path] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._open_store(path) if path else None
+
+    def _open_store(self, path: Path) -> sqlite3.Connection:
+        """Open (and create) the on-disk store shared between processes"""
+        db = sqlite3.connect(str(path), timeout=5, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS query_cache (
+                key TEXT PRIMARY KEY,
+                data_version TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                value TEXT NOT NULL
+            )
+        """)
+        db.commit()
+        return db
+
+    def get(self, key: str, data_version: str) -> Optional[Any]:
+        """
+        Look up a cached value
+
+        Returns:
+            The cached value, or None on a miss (absent, expired or computed
+            against another data version)
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, expires_at, encoded = entry
+                if version == data_version and expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(encoded)
+                del self._entries[key]
+
+            if self._db is not None:
+                encoded = self._get_stored(key, data_version, now)
+                if encoded is not None:
+                    self._remember(key, data_version, now + self.ttl_seconds, encoded)
+                    self.hits += 1
+                    return json.loads(encoded)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, data_version: str, value: Any):
+        """Cache a JSON-serializable value computed against data_version"""
+        expires_at = time.time() + self.ttl_seconds
+        encoded = json.dumps(value, default=json_default)
+
+        with self._lock:
+            self._remember(key, data_version, expires_at, encoded)
+            if self._db is not None:
+                self._put_stored(key, data_version, expires_at, encoded)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def clear(self):
+        """Drop every cached entry (memory and disk)"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM query_cache")
+                self._db.commit()
+
+    def _remember(self, key: str, data_version: str, expires_at: float, encoded: str):
+        """Insert into the in-memory LRU, evicting the least recently used"""
+        self._entries[key] = (data_version, expires_at, encoded)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_stored(self, key: str, data_version: str, now: float) -> Optional[str]:
+        """Read one entry's JSON from the on-disk store"""
+        try:
+            row = self._db.execute(
+                "SELECT value FROM query_cache WHERE key = ? AND data_version = ? AND expires_at > ?",
+                (key, data_version, now)
+            ).fetchone()
+            if row is None:
+                return None
+            encoded = row[0]
+            # Anything that is not valid JSON (e.g. an older pickled entry) misses
+            json.loads(encoded)
+            self._db.execute("UPDATE query_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return encoded
+        except (sqlite3.Error, ValueError):
+            # The disk store is best effort; fall back to memory only
+            return None
+
+    def _put_stored(self, key: str, data_version: str, expires_at: float, encoded: str):
+        """Write one entry to the on-disk store and trim it"""
+        now = time.time()
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO query_cache VALUES (?, ?, ?, ?, ?)",
+                (key, data_version, expires_at, now, encoded)
+            )
+            # Entries from older loads can never hit again
+            self._db.execute(
+                "DELETE FROM query_cache WHERE data_version != ? OR expires_at <= ?",
+                (data_version, now)
+            )
+            self._db.execute(
+                """
+                DELETE FROM query_cache WHERE key NOT IN (
+                    SELECT key FROM query_cache ORDER BY last_used DESC LIMIT ?
+                )
+                """,
+                (self.max_entries,)
+            )
+            self._db.commit()
+        except sqlite3.Error:
+            pass
+
+
+def default_query_cache() -> QueryCache:
+    """Cache configured from QUERY_CACHE_SIZE / QUERY_CACHE_TTL / QUERY_CACHE_PATH"""
+    return QueryCache(path=Path(QUERY_CACHE_PATH) if QUERY_CACHE_PATH else None)
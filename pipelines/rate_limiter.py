@@ -0,0 +1,231 @@
+"""
+Rate Limiter Module
+
+Token bucket shared by every request to the same API host:
+- Calibrates itself from the limit / remaining / reset headers
+  (X-RateLimit-* by default) on every response
+- Refills to the full limit when the server's window resets, so requests
+  run at the maximum allowed rate and only wait when the budget is spent
+- On 429 waits for Retry-After (header or JSON `retryAfter`) or the reset
+  time, then retries
+- Thread-safe: concurrent enrichment, parallel sources and generated
+  drivers hitting one host all draw from one bucket
+- Requests go through the host's pooled session (http_session.py)
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests as plain_requests
+
+from http_session import session_for
+
+# Without reset headers, assume the limit applies per minute
+DEFAULT_WINDOW_SECONDS = 60.0
+
+# Reset headers have one-second resolution; refill slightly after them
+RESET_MARGIN_SECONDS = 1.0
+
+
+def _retry_after_seconds(response: plain_requests.Response) -> Optional[float]:
+    """Seconds to wait according to Retry-After or a JSON retryAfter field"""
+    header = response.headers.get('Retry-After')
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    if isinstance(body, dict):
+        for container in (body, body.get('responseMetadata') or {}, body.get('error') or {}):
+            if isinstance(container, dict) and container.get('retryAfter') is not None:
+                return float(container['retryAfter'])
+    return None
+
+
+class RateLimiter:
+    """
+    Token bucket calibrated from rate limit response headers
+
+    Until the first response arrives the bucket is unbounded; afterwards it
+    holds what the server reports as remaining (minus requests still in
+    flight) and refills to the limit at the reset time. Servers that send
+    a limit but no reset refill continuously at limit / window_seconds.
+    """
+
+    def __init__(
+        self,
+        limit_header: str = 'X-RateLimit-Limit',
+        remaining_header: str = 'X-RateLimit-Remaining',
+        reset_header: str = 'X-RateLimit-Reset',
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        max_retries: int = 5
+    ):
+        self.limit_header = limit_header
+        self.remaining_header = remaining_header
+        self.reset_header = reset_header
+        self.window_seconds = window_seconds
+        self.max_retries = max_retries
+
+        self.limit: Optional[int] = None
+        self.tokens: Optional[float] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self.waited_seconds = 0.0
+        self._refilled_at = time.monotonic()
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Block until a request may be sent, then take a token"""
+        with self._condition:
+            while True:
+                wait = self._wait_seconds(time.time())
+                if wait <= 0:
+                    break
+                started = time.monotonic()
+                self._condition.wait(wait)
+                self.waited_seconds += time.monotonic() - started
+
+            if self.tokens is not None:
+                self.tokens -= 1
+            self.in_flight += 1
+
+    def release(self, response: Optional[plain_requests.Response] = None):
+        """Finish a request and calibrate the bucket from its response"""
+        with self._condition:
+            self.in_flight -= 1
+            if response is not None:
+                self._calibrate(response)
+            self._condition.notify_all()
+
+    def backoff(self, response: plain_requests.Response, attempt: int) -> float:
+        """Block new requests after a 429; returns the wait in seconds"""
+        with self._condition:
+            now = time.time()
+            wait = _retry_after_seconds(response)
+            if wait is None and self.reset_at:
+                wait = self.reset_at - now
+            if wait is None or wait <= 0:
+                wait = min(2 ** attempt, self.window_seconds)
+
+            self.tokens = 0
+            self.blocked_until = max(self.blocked_until, now + wait)
+            self._condition.notify_all()
+            return wait
+
+    def get(self, url: str, **kwargs: Any) -> plain_requests.Response:
+        """GET within the budget, waiting and retrying on 429"""
+        return self.request("GET", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> plain_requests.Response:
+        """Send a request within the budget, waiting and retrying on 429"""
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            response = None
+            try:
+                # 429s are retried here (after the right wait), not by the session
+                response = session_for(url).request(method, url, **kwargs)
+            finally:
+                self.release(response)
+
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+
+            wait = self.backoff(response, attempt)
+            print(f"⚠️ Rate limited by {urlparse(url).netloc}, retrying in {wait:.1f}s")
+
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Current calibration, for logging"""
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'tokens': self.tokens,
+                'reset_at': self.reset_at,
+                'in_flight': self.in_flight,
+                'waited_seconds': round(self.waited_seconds, 3),
+            }
+
+    def _wait_seconds(self, now: float) -> float:
+        """Seconds until the next token (0 if one is available)"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        self._refill(now)
+        if self.tokens is None or self.tokens >= 1:
+            return 0.0
+        if self.reset_at is not None:
+            return max(self.reset_at + RESET_MARGIN_SECONDS - now, 0.01)
+        if self.limit:
+            return (1 - self.tokens) * self.window_seconds / self.limit
+        return 0.0
+
+    def _refill(self, now: float):
+        """Refill at the server's window reset, or continuously without one"""
+        if self.tokens is None or self.limit is None:
+            return
+
+        if self.reset_at is not None:
+            if now >= self.reset_at + RESET_MARGIN_SECONDS:
+                self.tokens = float(self.limit - self.in_flight)
+                self.reset_at = None
+        else:
+            elapsed = time.monotonic() - self._refilled_at
+            self.tokens = min(float(self.limit), self.tokens + elapsed * self.limit / self.window_seconds)
+        self._refilled_at = time.monotonic()
+
+    def _calibrate(self, response: plain_requests.Response):
+        """Sync the bucket with the budget the server reports"""
+        headers = response.headers
+        limit = headers.get(self.limit_header)
+        remaining = headers.get(self.remaining_header)
+        reset = headers.get(self.reset_header)
+
+        try:
+            now = time.time()
+            new_window = self.tokens is None
+            if limit is not None:
+                self.limit = int(limit)
+            if reset is not None:
+                reset_value = float(reset)
+                # Epoch seconds or seconds until reset
+                reset_at = reset_value if reset_value > 1e9 else now + reset_value
+                if reset_at <= now:
+                    # Answered in a window that has already ended
+                    return
+                new_window = new_window or self.reset_at is None or reset_at > self.reset_at + 1
+                self.reset_at = reset_at
+            if remaining is not None:
+                # Requests still in flight are not counted by the server yet
+                available = float(int(remaining) - self.in_flight)
+                self.tokens = available if new_window else min(self.tokens, available)
+                self._refilled_at = time.monotonic()
+        except ValueError:
+            # Unparseable headers: keep the previous calibration
+            pass
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter_for(url: str, **kwargs: Any) -> RateLimiter:
+    """
+    Shared rate limiter for the host of `url`
+
+    The first caller for a host decides the header names and window;
+    later callers get the same instance.
+    """
+    host = urlparse(url).netloc or url
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = RateLimiter(**kwargs)
+        return _limiters[host]
@@ -11,9 +11,17 @@ import json
 
 
 class SourceGenerator:
-    def __init__(self, source_name: str, api_patterns: Dict[str, Any]):
+    def __init__(self, source_name: str, api_patterns: Dict[str, Any], stream_json: bool = False):
+        """
+        Args:
+            source_name: Name of the source (e.g., 'seznam')
+            api_patterns: Patterns discovered by APIExplorer
+            stream_json: Generate code that decodes each response's items
+                incrementally (json_stream) instead of calling response.json()
+        """
         self.source_name = source_name
         self.patterns = api_patterns
+        self.stream_json = stream_json
         self.resource_name = f"{source_name}_campaigns"
 
     def generate(self, base_url: str, endpoint: str, headers: Optional[Dict] = None) -> str:
@@ -53,7 +61,6 @@ class SourceGenerator:
         """Generate import statements"""
         imports = [
             "import dlt",
-            "from dlt.sources.helpers import requests",
             "import time"
         ]
 
@@ -61,6 +68,21 @@ class SourceGenerator:
         if self.patterns.get('response_format', {}).get('type') == 'wrapped':
             imports.append("import json")
 
+        # Incremental response decoding (pipelines/json_stream.py)
+        if self.stream_json:
+            imports.append("from json_stream import iter_response_items")
+
+        # Prefetching, checkpointed cursor pagination (pipelines/pagination.py)
+        if self.patterns.get('pagination', {}).get('type') == 'cursor':
+            imports.append("from pagination import resumable_pages")
+
+        # Shared per-host rate limiter (pipelines/rate_limiter.py), or the
+        # host's pooled session directly (pipelines/http_session.py)
+        if self.patterns.get('rate_limiting'):
+            imports.append("from rate_limiter import rate_limiter_for")
+        else:
+            imports.append("from http_session import session_for")
+
         return "\n".join(imports)
 
     def _generate_decorator(self) -> str:
@@ -104,9 +126,11 @@ class SourceGenerator:
         # Build headers
         lines.append(self._generate_headers(headers))
 
-        # Add rate limit checking if needed
+        # Add rate limit checking if needed (it sends through the pooled session)
         if self.patterns.get('rate_limiting'):
             lines.append(self._generate_rate_limit_check())
+        else:
+            lines.append(self._generate_session_setup())
 
         # Add pagination loop
         lines.append(self._generate_pagination_loop(endpoint))
@@ -127,17 +151,29 @@ class SourceGenerator:
         return "\n".join(lines)
 
     def _generate_rate_limit_check(self) -> str:
-        """Generate rate limit checking function"""
+        """Generate the shared rate limiter setup"""
         rl = self.patterns.get('rate_limiting', {})
+        limit_header = rl.get('limit_header', 'X-RateLimit-Limit')
         remaining_header = rl.get('remaining_header', 'X-RateLimit-Remaining')
+        reset_header = rl.get('reset_header', 'X-RateLimit-Reset')
 
         return f'''
-    def check_rate_limit(response):
-        """Check rate limit headers and sleep if needed"""
-        remaining = response.headers.get('{remaining_header}')
-        if remaining and int(remaining) < 10:
-            print(f"⚠️ Rate limit warning: {{remaining}} requests remaining")
-            time.sleep(1)
+    # Shared with every other request to this host; calibrated from the
+    # rate limit headers and retries 429s after the advertised wait
+    limiter = rate_limiter_for(
+        base_url,
+        limit_header='{limit_header}',
+        remaining_header='{remaining_header}',
+        reset_header='{reset_header}'
+    )
+'''
+
+    def _generate_session_setup(self) -> str:
+        """Generate the shared pooled session setup"""
+        return '''
+    # Keep-alive connections, timeouts and retries shared with every
+    # other request to this host
+    session = session_for(base_url)
 '''
 
     def _generate_pagination_loop(self, endpoint: str) -> str:
@@ -163,59 +199,54 @@ class SourceGenerator:
         # Handle nested paths
         cursor_get = self._generate_nested_get(cursor_path)
         has_next_get = self._generate_nested_get(has_next_path)
-        data_get = self._generate_nested_get(data_path)
 
         response_check = self._generate_response_check()
+        if self.stream_json:
+            # Status and pagination are only complete once the items are read
+            decode = f"{self._generate_decode(data_path, materialize=True)}\n\n{response_check}"
+        else:
+            decode = f"data = response.json()\n\n{response_check}\n\nitems = {self._generate_nested_get(data_path)}"
 
         return f'''
-    cursor = None
-    page = 1
+    def fetch_page(state):
+        """Fetch one page; returns (items, next page state or None)"""
+        cursor, page = state
 
-    while True:
         # Build pagination parameters
         params = {{'page': page, 'pageSize': 10}}
         if cursor:
             params['cursor'] = cursor
 
         # Fetch data
-        response = requests.get(
-            f"{{base_url}}{endpoint}",
-            headers=headers,
-            params=params
-        )
-        response.raise_for_status()
-{self._indent(self._generate_rate_limit_call() if self.patterns.get('rate_limiting') else '', 8)}
+{self._indent(self._generate_request(endpoint), 8)}
 
-        data = response.json()
+{self._indent(decode, 8)}
 
-{self._indent(response_check, 8)}
+        # Check for next page
+        has_next = {has_next_get}
+        if not items or not has_next:
+            return items, None
 
-        items = {data_get}
+        return items, ({cursor_get}, page + 1)
 
-        if not items:
-            break
+    pages = 0
+
+    # The next page is fetched while this one's items are processed; the
+    # cursor is checkpointed after each page, so a failed run resumes there
+    for items in resumable_pages(fetch_page, start=(None, 1)):
+        pages += 1
 
         # Yield each item
         for item in items:
             item['source'] = '{self.source_name}'
             yield item
 
-        # Check for next page
-        has_next = {has_next_get}
-        if not has_next:
-            break
-
-        cursor = {cursor_get}
-        page += 1
-        time.sleep(0.1)
-
-    print(f"✅ {self.source_name}: Extracted {{page}} pages")
+    print(f"✅ {self.source_name}: Extracted {{pages}} pages")
 '''
 
     def _generate_offset_pagination(self, endpoint: str, pagination: Dict) -> str:
         """Generate offset-based pagination"""
         data_path = self.patterns.get('data_path', 'data')
-        data_get = self._generate_nested_get(data_path)
 
         return f'''
     offset = 0
@@ -224,23 +255,18 @@ class SourceGenerator:
     while True:
         params = {{'offset': offset, 'limit': limit}}
 
-        response = requests.get(
-            f"{{base_url}}{endpoint}",
-            headers=headers,
-            params=params
-        )
-        response.raise_for_status()
-{self._indent(self._generate_rate_limit_call() if self.patterns.get('rate_limiting') else '', 8)}
+{self._indent(self._generate_request(endpoint), 8)}
 
-        data = response.json()
-        items = {data_get}
-
-        if not items:
-            break
+{self._indent(self._generate_decode(data_path), 8)}
 
+        count = 0
         for item in items:
             item['source'] = '{self.source_name}'
             yield item
+            count += 1
+
+        if not count:
+            break
 
         offset += limit
         time.sleep(0.1)
@@ -250,7 +276,6 @@ class SourceGenerator:
         """Generate page-based pagination"""
         next_key = pagination.get('next_key', 'nextPage')
         data_path = self.patterns.get('data_path', 'data')
-        data_get = self._generate_nested_get(data_path)
 
         return f'''
     page = 1
@@ -258,22 +283,18 @@ class SourceGenerator:
     while True:
         params = {{'page': page, 'per_page': 100}}
 
-        response = requests.get(
-            f"{{base_url}}{endpoint}",
-            headers=headers,
-            params=params
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        items = {data_get}
+{self._indent(self._generate_request(endpoint), 8)}
 
-        if not items:
-            break
+{self._indent(self._generate_decode(data_path), 8)}
 
+        count = 0
         for item in items:
             item['source'] = '{self.source_name}'
             yield item
+            count += 1
+
+        if not count:
+            break
 
         if not data.get('{next_key}'):
             break
@@ -285,17 +306,11 @@ class SourceGenerator:
     def _generate_no_pagination(self, endpoint: str) -> str:
         """Generate simple non-paginated extraction"""
         data_path = self.patterns.get('data_path', 'data')
-        data_get = self._generate_nested_get(data_path)
 
         return f'''
-    response = requests.get(
-        f"{{base_url}}{endpoint}",
-        headers=headers
-    )
-    response.raise_for_status()
+{self._indent(self._generate_request(endpoint, with_params=False), 4)}
 
-    data = response.json()
-    items = {data_get}
+{self._indent(self._generate_decode(data_path), 4)}
 
     for item in items:
         item['source'] = '{self.source_name}'
@@ -311,16 +326,42 @@ class SourceGenerator:
             status_get = self._generate_nested_get(status_path)
 
             return f'''# Check response status
-        status = {status_get}
-        if status != 'SUCCESS':
-            error = data.get('responseMetadata', {{}}).get('message', 'Unknown error')
-            raise Exception(f"API error: {{error}}")'''
+status = {status_get}
+if status != 'SUCCESS':
+    error = data.get('responseMetadata', {{}}).get('message', 'Unknown error')
+    raise Exception(f"API error: {{error}}")'''
 
         return ""
 
-    def _generate_rate_limit_call(self) -> str:
-        """Generate call to rate limit check"""
-        return "check_rate_limit(response)"
+    def _generate_request(self, endpoint: str, with_params: bool = True) -> str:
+        """Generate the GET request (streamed when decoding incrementally)"""
+        args = ['f"{base_url}' + endpoint + '"', "headers=headers"]
+        if with_params:
+            args.append("params=params")
+        if self.stream_json:
+            args.append("stream=True")
+
+        args_str = ",\n    ".join(args)
+        return f"""response = {self._generate_http_get()}(
+    {args_str}
+)
+response.raise_for_status()"""
+
+    def _generate_decode(self, data_path: str, materialize: bool = False) -> str:
+        """Generate the decoding of `items` (and `data`) from the response"""
+        if not self.stream_json:
+            return f"data = response.json()\nitems = {self._generate_nested_get(data_path)}"
+
+        items = f"iter_response_items(response, '{data_path}', data)"
+        if materialize:
+            items = f"list({items})"
+        return f"""# Decode the items as they arrive; the other fields land in data
+data = {{}}
+items = {items}"""
+
+    def _generate_http_get(self) -> str:
+        """Generate the GET call: through the rate limiter when the API has one"""
+        return "limiter.get" if self.patterns.get('rate_limiting') else "session.get"
 
     def _generate_nested_get(self, path: str) -> str:
         """Generate nested .get() calls for path like 'data.campaigns'"""
@@ -349,7 +390,8 @@ def generate_source_file(
     endpoint: str,
     api_patterns: Dict[str, Any],
     output_path: Path,
-    headers: Optional[Dict] = None
+    headers: Optional[Dict] = None,
+    stream_json: bool = False
 ) -> Path:
     """
     Generate a complete dlthub source file
@@ -361,11 +403,12 @@ def generate_source_file(
         api_patterns: Patterns discovered by APIExplorer
         output_path: Path to write the source file
         headers: Optional headers
+        stream_json: Decode responses incrementally in the generated code
 
     Returns:
         Path to generated file
     """
-    generator = SourceGenerator(source_name, api_patterns)
+    generator = SourceGenerator(source_name, api_patterns, stream_json=stream_json)
     code = generator.generate(base_url, endpoint, headers)
 
     output_path.write_text(code)
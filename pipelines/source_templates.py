@@ -16,6 +16,8 @@ REST_API_TEMPLATE = '''"""
 import dlt
 from dlt.sources.rest_api import rest_api_source
 
+from http_session import session_for
+
 def {function_name}(
     base_url: str = "{default_base_url}",
     api_key: str = dlt.secrets.value,
@@ -34,6 +36,7 @@ def {function_name}(
     config = {{
         "client": {{
             "base_url": base_url,
+            "session": session_for(base_url),
             {auth_config}
         }},
         "resource_defaults": {{
@@ -62,9 +65,10 @@ SOAP_TEMPLATE = '''"""
 """
 
 import dlt
-from dlt.sources.helpers import requests
 import xmltodict
 
+from http_session import session_for
+
 @dlt.resource(
     name="{resource_name}",
     write_disposition="merge",
@@ -96,7 +100,7 @@ def {function_name}(
         'SOAPAction': '"{soap_action_header}"'
     }}
 
-    response = requests.post(wsdl_url, data=envelope, headers=headers)
+    response = session_for(wsdl_url).post(wsdl_url, data=envelope, headers=headers)
     response.raise_for_status()
 
     # Parse XML response
@@ -117,7 +121,8 @@ GRAPHQL_TEMPLATE = '''"""
 """
 
 import dlt
-from dlt.sources.helpers import requests
+
+from http_session import session_for
 
 @dlt.resource(
     name="{resource_name}",
@@ -152,7 +157,7 @@ def {function_name}(
         'query': query
     }}
 
-    response = requests.post(graphql_url, json=payload, headers=headers)
+    response = session_for(graphql_url).post(graphql_url, json=payload, headers=headers)
     response.raise_for_status()
 
     data = response.json()
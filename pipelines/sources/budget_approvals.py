@@ -1,12 +1,122 @@
 """
 SOAP Budget Approval Source
 Extracts budget approval data from enterprise SOAP service mock
+
+The SOAP resource posts GetCampaignApprovals envelopes for consecutive date
+windows, several at a time (the history before them in one request with an
+open lower bound), and parses each response incrementally: every <Approval> is emitted
+and then cleared as soon as its closing tag arrives, so memory stays
+constant however many approvals the finance system returns.
 """
 
 import dlt
-import requests
 import xml.etree.ElementTree as ET
-from typing import Iterator, Dict, Any
+from datetime import date, timedelta
+from typing import Iterable, Iterator, Dict, Any, List, Optional
+
+from date_windows import (
+    DEFAULT_WINDOW_DAYS,
+    DEFAULT_WINDOW_WORKERS,
+    fetch_windows,
+    parse_date,
+    replace_by_window,
+)
+from http_session import session_for
+from json_stream import DEFAULT_CHUNK_SIZE, iter_response_items
+
+SOAP_ENVELOPE = """<?xml version="1.0" encoding="UTF-8"?>
+<soap-env:Envelope
+    xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"
+    xmlns:ns0="http://company.example.com/budget/approval">
+    <soap-env:Body>
+        <ns0:GetCampaignApprovals>
+            {date_from}
+            <ns0:date_to>{date_to}</ns0:date_to>
+        </ns0:GetCampaignApprovals>
+    </soap-env:Body>
+</soap-env:Envelope>"""
+
+# Approvals change status (Pending -> Approved/Rejected) after the window
+# they are dated in has closed, so recent windows are fetched on every run
+APPROVAL_REFETCH_DAYS = 90
+
+SOAP_HEADERS = {
+    'Content-Type': 'text/xml; charset=utf-8',
+    'SOAPAction': '"GetCampaignApprovals"',
+}
+
+
+def _date_from_element(date_from: Optional[date]) -> str:
+    """The envelope's date_from; an empty element leaves the range open"""
+    if date_from is None:
+        return "<ns0:date_from/>"
+    return f"<ns0:date_from>{date_from.isoformat()}</ns0:date_from>"
+
+
+def _local_name(tag: str) -> str:
+    """Tag without its {namespace}"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _approval_record(approval: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform XML-style field names to snake_case"""
+    return {
+        "approval_id": approval.get("ApprovalID"),
+        "campaign_id": approval.get("CampaignID"),
+        "campaign_name": approval.get("CampaignName"),
+        "approved_amount": float(approval.get("ApprovedAmount") or 0),
+        "currency": approval.get("Currency") or "USD",
+        "cost_center": approval.get("CostCenter"),
+        "approval_date": approval.get("ApprovalDate"),
+        "effective_date": approval.get("EffectiveDate"),
+        "approver_name": approval.get("ApproverName"),
+        "approver_email": approval.get("ApproverEmail"),
+        "status": approval.get("Status"),
+        "notes": approval.get("Notes"),
+    }
+
+
+def iter_soap_approvals(chunks: Iterable[bytes]) -> Iterator[Dict[str, Optional[str]]]:
+    """
+    Yield every <Approval> of a GetCampaignApprovals response as it is parsed
+
+    Incremental iterparse over the response chunks (XMLPullParser, so it
+    works on streamed and replayed responses alike). Each approval is
+    cleared and detached from its parent once emitted, so the parsed tree
+    never grows.
+
+    Raises:
+        Exception: The service answered with a SOAP Fault or Error element
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    parents = []
+
+    def events():
+        for event, elem in parser.read_events():
+            if event == "start":
+                parents.append(elem)
+                continue
+
+            parents.pop()
+            name = _local_name(elem.tag)
+            if name == "Approval":
+                yield {_local_name(child.tag): child.text for child in elem}
+                elem.clear()
+                if parents:
+                    parents[-1].remove(elem)
+            elif name in ("Fault", "Error"):
+                message = next(
+                    (child.text for child in elem.iter()
+                     if _local_name(child.tag) in ("faultstring", "Message")),
+                    "Unknown error"
+                )
+                raise Exception(f"SOAP budget service error: {message}")
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from events()
+    parser.close()
+    yield from events()
 
 
 @dlt.resource(
@@ -14,77 +124,162 @@ from typing import Iterator, Dict, Any
     primary_key="ApprovalID",
     write_disposition="merge"
 )
-def budget_approvals_resource(base_url: str = "http://localhost:5001") -> Iterator[Dict[str, Any]]:
+def budget_approvals_soap_resource(
+    base_url: str = "http://localhost:5001",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    max_workers: int = DEFAULT_WINDOW_WORKERS,
+    replace_windows: bool = False,
+    refetch_days: int = APPROVAL_REFETCH_DAYS
+) -> Iterator[List[Dict[str, Any]]]:
     """
-    DLT resource for budget approvals from SOAP service
+    DLT resource for budget approvals over the SOAP interface
+
+    Posts one GetCampaignApprovals request per date window, max_workers
+    at a time (date_windows.fetch_windows), and streams each response
+    through iter_soap_approvals. Windows that closed more than
+    refetch_days ago are checkpointed, so a re-run only requests the recent
+    windows and any that failed.
+
+    Without start_date, the first run requests everything dated before the
+    refetch horizon in a single request with an open lower bound and keeps
+    that day in the resource state; this and every later run fetch the
+    days after it by date window.
+
+    With replace_windows each window is loaded as a partition of the
+    approvals dated in it (see date_windows).
 
     Args:
         base_url: Base URL for the SOAP Budget mock server
+        start_date: First approval date to fetch (YYYY-MM-DD; default: the
+            whole history)
+        end_date: Last approval date to fetch (default: today)
+        window_days: Days covered by one SOAP request
+        max_workers: SOAP requests in flight at the same time
+        replace_windows: Tag approvals with their window partition
+        refetch_days: Days back from today whose windows are requested on
+            every run
 
     Yields:
-        Budget approval records
+        Budget approval records, one list per window
     """
-    # For simplicity, use the JSON endpoint instead of parsing SOAP XML
-    # In production, would use proper SOAP client
-    response = requests.get(f"{base_url}/approvals/json")
-    response.raise_for_status()
+    session = session_for(base_url)
 
-    data = response.json()
-    approvals = data.get("approvals", [])
+    def fetch_window(date_from: Optional[date], date_to: date) -> List[Dict[str, Any]]:
+        envelope = SOAP_ENVELOPE.format(date_from=_date_from_element(date_from), date_to=date_to.isoformat())
+        response = session.post(
+            f"{base_url}/soap/BudgetService",
+            data=envelope.encode("utf-8"),
+            headers=SOAP_HEADERS,
+            stream=True
+        )
 
-    for approval in approvals:
-        # Transform XML-style field names to snake_case
-        yield {
-            "approval_id": approval.get("ApprovalID"),
-            "campaign_id": approval.get("CampaignID"),
-            "campaign_name": approval.get("CampaignName"),
-            "approved_amount": float(approval.get("ApprovedAmount", 0)),
-            "currency": approval.get("Currency", "USD"),
-            "cost_center": approval.get("CostCenter"),
-            "approval_date": approval.get("ApprovalDate"),
-            "effective_date": approval.get("EffectiveDate"),
-            "approver_name": approval.get("ApproverName"),
-            "approver_email": approval.get("ApproverEmail"),
-            "status": approval.get("Status"),
-            "notes": approval.get("Notes"),
-        }
+        # Faults come back as 500 with an XML body: parse them for the message
+        with response:
+            chunks = response.iter_content(chunk_size=DEFAULT_CHUNK_SIZE)
+            approvals = [_approval_record(approval) for approval in iter_soap_approvals(chunks)]
+            response.raise_for_status()
+        return approvals
 
+    if start_date is None:
+        state = dlt.current.resource_state()
+        history_until = parse_date(state.get('history_until'))
+        if history_until is None:
+            history_until = date.today() - timedelta(days=refetch_days + 1)
+            approvals = fetch_window(None, history_until)
+            if approvals:
+                yield approvals
+            state['history_until'] = history_until.isoformat()
+        start_date = history_until + timedelta(days=1)
 
-@dlt.source
-def budget_approvals_source(base_url: str = "http://localhost:5001"):
+    yield from fetch_windows(
+        fetch_window,
+        start_date,
+        end_date,
+        window_days=window_days,
+        max_workers=max_workers,
+        primary_key="approval_id",
+        partition_day=(
+            (lambda approval: parse_date((approval.get("approval_date") or "")[:10]))
+            if replace_windows else None
+        ),
+        refetch_days=refetch_days
+    )
+
+
+@dlt.resource(
+    name="budget_approvals",
+    primary_key="ApprovalID",
+    write_disposition="merge"
+)
+def budget_approvals_resource(
+    base_url: str = "http://localhost:5001",
+    stream: bool = False
+) -> Iterator[Dict[str, Any]]:
     """
-    Source for budget approvals from SOAP service
+    DLT resource for budget approvals from the service's JSON endpoint
 
     Args:
         base_url: Base URL for the SOAP Budget mock server
+        stream: Decode the approvals array incrementally (json_stream)
+            instead of materializing the body with response.json()
 
     Yields:
-        DLT resources with budget approval data
+        Budget approval records
     """
-    return budget_approvals_resource(base_url=base_url)
+    # Mock-only shortcut: the real finance system has no JSON endpoint
+    response = session_for(base_url).get(f"{base_url}/approvals/json", stream=stream)
+    response.raise_for_status()
 
+    if stream:
+        approvals = iter_response_items(response, "approvals")
+    else:
+        approvals = response.json().get("approvals", [])
+
+    for approval in approvals:
+        yield _approval_record(approval)
 
-def transform_budget_approval(item: dict) -> dict:
+
+@dlt.source
+def budget_approvals_source(
+    base_url: str = "http://localhost:5001",
+    stream: bool = False,
+    json_endpoint: bool = False,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    max_workers: int = DEFAULT_WINDOW_WORKERS,
+    replace_windows: bool = False
+):
     """
-    Transform budget approval to unified format
+    Source for budget approvals from SOAP service
 
     Args:
-        item: Raw budget approval item
+        base_url: Base URL for the SOAP Budget mock server
+        stream: Decode the JSON endpoint's response incrementally (SOAP
+            responses are always parsed incrementally)
+        json_endpoint: Read the mock's /approvals/json shortcut instead of
+            the SOAP interface
+        start_date: First approval date to fetch (default: the whole
+            history)
+        end_date: Last approval date to fetch (default: today)
+        window_days: Days covered by one SOAP request
+        max_workers: SOAP requests in flight at the same time
+        replace_windows: Load by replacing whole date windows instead of
+            merging approval by approval
 
-    Returns:
-        Transformed approval dict
+    Yields:
+        DLT resources with budget approval data
     """
-    return {
-        "approval_id": item["approval_id"],
-        "campaign_id": item["campaign_id"],
-        "source": "soap_budget",
-        "approved_budget": item["approved_amount"],
-        "approval_date": item["approval_date"],
-        "cost_center": item["cost_center"],
-        "approver": item["approver_name"],
-        "currency": item["currency"],
-        "raw_data": item,
-    }
+    if json_endpoint:
+        return budget_approvals_resource(base_url=base_url, stream=stream)
+
+    windows = {'end_date': end_date, 'window_days': window_days, 'max_workers': max_workers}
+    if start_date:
+        windows['start_date'] = start_date
+    resource = budget_approvals_soap_resource(base_url=base_url, replace_windows=replace_windows, **windows)
+    return replace_by_window(resource) if replace_windows else resource
 
 
 if __name__ == "__main__":
@@ -1,78 +1,329 @@
 """
 Google Ads API Source
 Extracts Nike campaign data from Google Ads API mock
+
+Campaigns come from the googleAds:searchStream endpoint, which answers
+with a JSON array of result batches sent as they are built. The body is
+decoded incrementally (json_stream) and every row is mapped as soon as it
+is complete, so time to first row and memory do not grow with the account.
 """
 
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
 import dlt
-from dlt.sources.rest_api import RESTAPIConfig, rest_api_resources
 
+from date_windows import (
+    DEFAULT_WINDOW_DAYS,
+    DEFAULT_WINDOW_WORKERS,
+    fetch_windows,
+    parse_date,
+    replace_by_window,
+)
+from http_session import session_for
+from json_stream import batched, iter_response_items
 
-@dlt.source
-def google_ads_source(base_url: str = "http://localhost:8000"):
+# Nike's Google Ads customer account
+CUSTOMER_ID = "1234567890"
+
+SEARCH_QUERY = """
+SELECT campaign.id, campaign.name, campaign.status, campaign.advertising_channel_type,
+       campaign.start_date, campaign.end_date, campaign_budget.amount_micros,
+       metrics.impressions, metrics.clicks, metrics.cost_micros,
+       metrics.conversions, metrics.conversions_value
+FROM campaign
+"""
+
+# advertisingChannelType -> channel name used by the campaigns list
+CHANNEL_NAMES = {
+    "VIDEO": "YouTube",
+    "DISPLAY": "Google Display",
+    "SEARCH": "Search",
+}
+
+# End date Google reports for campaigns without one
+OPEN_END_DATE = "20991231"
+
+# Days before the previous run a refresh still re-reads: campaigns that
+# ended in this span may still get late conversions and status changes
+DEFAULT_LOOKBACK_DAYS = 7
+
+
+def _search_date(value: Optional[str]) -> Optional[str]:
+    """YYYYMMDD as YYYY-MM-DD (None for open-ended campaigns)"""
+    if not value or value == OPEN_END_DATE:
+        return None
+    return f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+
+
+def campaign_running(campaign: Dict[str, Any]) -> bool:
+    """True while a campaign has no end_date or has not ended yet"""
+    end_date = parse_date(campaign.get("end_date"))
+    return end_date is None or end_date >= date.today()
+
+
+def search_row_campaign(row: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Source for Google Ads API
+    Map a searchStream result row to the shape of the campaigns list
+
+    Rows carry campaign, metrics and campaignBudget objects with camelCase
+    fields and int64 values as strings; the loaded google_campaigns table
+    keeps the flat snake_case fields either endpoint produces.
+    """
+    campaign = row.get("campaign", {})
+    metrics = row.get("metrics", {})
+    budget = row.get("campaignBudget", {})
+
+    return {
+        "id": campaign.get("id"),
+        "name": campaign.get("name"),
+        "status": campaign.get("status"),
+        "budget_micros": int(budget.get("amountMicros") or 0),
+        "channel": CHANNEL_NAMES.get(campaign.get("advertisingChannelType"), campaign.get("advertisingChannelType")),
+        "start_date": _search_date(campaign.get("startDate")),
+        "end_date": _search_date(campaign.get("endDate")),
+        "metrics": {
+            "impressions": int(metrics.get("impressions") or 0),
+            "clicks": int(metrics.get("clicks") or 0),
+            "cost_micros": int(metrics.get("costMicros") or 0),
+            "conversions": float(metrics.get("conversions") or 0),
+            "conversion_value_micros": int(metrics.get("conversionValueMicros") or 0),
+        },
+    }
+
+
+def iter_search_stream(
+    session,
+    base_url: str,
+    customer_id: str = CUSTOMER_ID,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Campaigns from googleAds:searchStream, mapped as each row arrives
 
     Args:
+        session: HTTP session to post with
         base_url: Base URL for the Google Ads mock server
+        customer_id: Google Ads customer account
+        start_date: Only campaigns running on or after this day
+        end_date: Only campaigns starting on or before this day
 
     Yields:
-        DLT resources with Google Ads campaign data
+        Campaign records (search_row_campaign)
     """
-    config: RESTAPIConfig = {
-        "client": {
-            "base_url": base_url,
-        },
-        "resource_defaults": {
-            "primary_key": "id",
-            "write_disposition": "merge",
-        },
-        "resources": [
-            {
-                "name": "google_campaigns",
-                "endpoint": {
-                    "path": "campaigns",
-                    "params": {
-                        "advertiser_name": "Nike",
-                    },
-                    # Google mock returns {campaigns: [...]}
-                    "data_selector": "campaigns",
-                },
-            }
-        ],
-    }
+    params = {"start_date": start_date, "end_date": end_date}
+    response = session.post(
+        f"{base_url}/googleads/v16/customers/{customer_id}/googleAds:searchStream",
+        params={name: value for name, value in params.items() if value},
+        json={"query": SEARCH_QUERY},
+        stream=True
+    )
+    response.raise_for_status()
 
-    yield from rest_api_resources(config)
+    for row in iter_response_items(response, "*.results"):
+        yield search_row_campaign(row)
 
 
-def transform_google_campaign(item: dict) -> dict:
+@dlt.resource(
+    name="google_campaigns",
+    primary_key="id",
+    write_disposition="merge"
+)
+def google_campaigns(
+    base_url: str = "http://localhost:8000",
+    customer_id: str = CUSTOMER_ID,
+    list_endpoint: bool = False,
+    stream: bool = False,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS
+) -> Iterator[List[Dict[str, Any]]]:
     """
-    Transform Google Ads response to unified campaign format
+    Google Ads campaigns, refreshing only those that can still change
+
+    Google has no modification cursor, and a campaign's metrics keep
+    changing for as long as it runs. So the first run loads every campaign,
+    and later runs request the campaigns running on or after the previous
+    run's day minus lookback_days (start_date filter of both endpoints).
+    Campaigns that ended before that date were final when they were last
+    loaded. Open-ended campaigns are always included. The previous run's
+    day is kept in the resource state.
 
     Args:
-        item: Raw Google Ads campaign item
+        base_url: Base URL for the Google Ads mock server
+        customer_id: Google Ads customer account
+        list_endpoint: Read the /campaigns list instead of searchStream
+        stream: Decode the campaigns list incrementally (json_stream);
+            searchStream responses are always decoded incrementally
+        lookback_days: Days before the previous run still re-read
 
-    Returns:
-        Transformed campaign dict
+    Yields:
+        Campaigns, in batches
     """
-    # Google Ads uses micros (1 dollar = 1,000,000 micros)
-    budget_micros = item.get("budget_amount_micros", 0)
-    cost_micros = item.get("cost_micros", 0)
+    session = session_for(base_url)
+    state = dlt.current.resource_state()
+    today = date.today()
 
-    return {
-        "campaign_id": item["campaign_id"],
-        "campaign_name": item.get("campaign_name", ""),
-        "source": "google",
-        "channel": item.get("channel", "Google"),
-        "budget": budget_micros / 1_000_000,  # Convert micros to dollars
-        "spend": cost_micros / 1_000_000,
-        "start_date": item.get("start_date"),
-        "end_date": item.get("end_date"),
-        "impressions_min": item.get("impressions", 0),
-        "impressions_max": item.get("impressions", 0),  # Google doesn't provide range
-        "clicks": item.get("clicks", 0),
-        "currency": "USD",
-        "raw_data": item,
-    }
+    since = None
+    if state.get('last_run'):
+        since = (parse_date(state['last_run']) - timedelta(days=lookback_days)).isoformat()
+
+    if list_endpoint:
+        params = {"advertiser_name": "Nike", "start_date": since}
+        response = session.get(
+            f"{base_url}/campaigns",
+            params={name: value for name, value in params.items() if value},
+            stream=stream
+        )
+        response.raise_for_status()
+        if stream:
+            yield from batched(iter_response_items(response, "campaigns"))
+        else:
+            yield response.json().get("campaigns", [])
+    else:
+        yield from batched(iter_search_stream(session, base_url, customer_id, start_date=since))
+
+    state['last_run'] = today.isoformat()
+
+
+@dlt.resource(
+    name="google_campaigns",
+    primary_key="id",
+    write_disposition="merge"
+)
+def google_campaigns_by_window(
+    base_url: str = "http://localhost:8000",
+    start_date: str = "2025-01-01",
+    end_date: Optional[str] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    max_workers: int = DEFAULT_WINDOW_WORKERS,
+    stream: bool = False,
+    list_endpoint: bool = False,
+    customer_id: str = CUSTOMER_ID,
+    replace_windows: bool = False
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Google Ads campaigns fetched by date window, max_workers windows at a time
+
+    Each window requests the campaigns running at any time in it (the
+    endpoint's start_date / end_date overlap filter); campaigns returned by
+    several windows are merged on id. Closed windows are checkpointed
+    (date_windows.fetch_windows), so a re-run only requests the current
+    window, any that failed and any whose campaigns are still running.
+
+    With replace_windows each campaign belongs to the window its
+    start_date falls in, and windows are loaded as partitions (see
+    date_windows).
+
+    Args:
+        base_url: Base URL for the Google Ads mock server
+        start_date: First day of the range (YYYY-MM-DD)
+        end_date: Last day of the range (default: today)
+        window_days: Days covered by one request
+        max_workers: Requests in flight at the same time
+        stream: Decode the campaigns list incrementally (json_stream)
+        list_endpoint: Read the /campaigns list instead of searchStream
+        customer_id: Google Ads customer account
+        replace_windows: Tag campaigns with their window partition
+
+    Yields:
+        Campaigns, one list per window
+    """
+    session = session_for(base_url)
+
+    def fetch_window(date_from: date, date_to: date) -> List[Dict[str, Any]]:
+        if not list_endpoint:
+            return list(iter_search_stream(
+                session, base_url, customer_id, date_from.isoformat(), date_to.isoformat()
+            ))
+
+        params = {
+            "advertiser_name": "Nike",
+            "start_date": date_from.isoformat(),
+            "end_date": date_to.isoformat(),
+        }
+        response = session.get(f"{base_url}/campaigns", params=params, stream=stream)
+        response.raise_for_status()
+        if stream:
+            return list(iter_response_items(response, "campaigns"))
+        return response.json().get("campaigns", [])
+
+    yield from fetch_windows(
+        fetch_window,
+        start_date,
+        end_date,
+        window_days=window_days,
+        max_workers=max_workers,
+        primary_key="id",
+        partition_day=(lambda campaign: parse_date(campaign.get("start_date"))) if replace_windows else None,
+        is_open=campaign_running
+    )
+
+
+@dlt.source
+def google_ads_source(
+    base_url: str = "http://localhost:8000",
+    stream: bool = False,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    max_workers: int = DEFAULT_WINDOW_WORKERS,
+    list_endpoint: bool = False,
+    customer_id: str = CUSTOMER_ID,
+    replace_windows: bool = False,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS
+):
+    """
+    Source for Google Ads API
+
+    Incremental: after the first run, only campaigns still running on or
+    after the previous run's day minus lookback_days are requested
+    (start_date filter of the searchStream and campaigns endpoints), so
+    running campaigns keep getting fresh metrics. Campaigns that ended
+    earlier no longer change.
+
+    Args:
+        base_url: Base URL for the Google Ads mock server
+        stream: Decode the campaigns list incrementally (json_stream)
+            instead of materializing each body with response.json();
+            searchStream responses are always decoded incrementally
+        start_date: Backfill / refresh by date window from this day
+            (YYYY-MM-DD) instead of the incremental cursor
+        end_date: Last day of the windowed range (default: today)
+        window_days: Days covered by one windowed request
+        max_workers: Windowed requests in flight at the same time
+        list_endpoint: Read the mock's /campaigns convenience list instead
+            of googleAds:searchStream
+        customer_id: Google Ads customer account
+        replace_windows: Load the windowed range by replacing whole
+            windows instead of merging campaign by campaign
+        lookback_days: Days before the previous run an incremental
+            refresh still re-reads
+
+    Yields:
+        DLT resources with Google Ads campaign data
+    """
+    if start_date:
+        resource = google_campaigns_by_window(
+            base_url=base_url,
+            start_date=start_date,
+            end_date=end_date,
+            window_days=window_days,
+            max_workers=max_workers,
+            stream=stream,
+            list_endpoint=list_endpoint,
+            customer_id=customer_id,
+            replace_windows=replace_windows
+        )
+        yield replace_by_window(resource) if replace_windows else resource
+        return
+
+    yield google_campaigns(
+        base_url=base_url,
+        customer_id=customer_id,
+        list_endpoint=list_endpoint,
+        stream=stream,
+        lookback_days=lookback_days
+    )
 
 
 if __name__ == "__main__":
@@ -3,71 +3,120 @@ Meta Ad Library API Source
 Extracts Nike campaign data from Meta (Facebook/Instagram) Ad Library mock
 """
 
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
 import dlt
-from dlt.sources.rest_api import RESTAPIConfig, rest_api_resources
 
+from http_session import session_for
+from json_stream import batched, iter_response_items
 
-@dlt.source
-def meta_ads_source(base_url: str = "http://localhost:3001"):
+# ad_delivery_*_time format
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Start assumed for a delivering ad that reports none: re-read everything
+EARLIEST_TIME = "1970-01-01T00:00:00Z"
+
+# Days before the previous run a refresh still re-reads: ads that started
+# in this span may have been published to the library late
+DEFAULT_LOOKBACK_DAYS = 7
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """An ad_delivery_*_time as an aware datetime (None when empty)"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def ad_delivering(ad: Dict[str, Any], now: datetime) -> bool:
+    """True while an ad has no ad_delivery_stop_time or has not stopped yet"""
+    stop_time = _parse_time(ad.get("ad_delivery_stop_time"))
+    return stop_time is None or stop_time >= now
+
+
+@dlt.resource(
+    name="meta_campaigns",
+    primary_key="id",
+    write_disposition="merge"
+)
+def meta_campaigns(
+    base_url: str = "http://localhost:3001",
+    stream: bool = False,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS
+) -> Iterator[List[Dict[str, Any]]]:
     """
-    Source for Meta Ad Library API
+    Meta ads, refreshing only those that can still change
+
+    The Ad Library only filters by delivery start
+    (ad_delivery_start_time_gte), while an ad's spend and impressions keep
+    changing for as long as it is delivered. So the first run loads every
+    ad, and later runs request the ads that started after the previous
+    run minus lookback_days, or after the earliest start of an ad that was
+    still delivering then, whichever is earlier. Both are kept in the
+    resource state (the previous run as a day).
 
     Args:
         base_url: Base URL for the Meta Ad Library mock server
+        stream: Decode the response incrementally (json_stream) instead of
+            materializing the body with response.json()
+        lookback_days: Days before the previous run still re-read
 
     Yields:
-        DLT resources with Meta ad campaign data
+        Ads, in batches
     """
-    config: RESTAPIConfig = {
-        "client": {
-            "base_url": base_url,
-        },
-        "resource_defaults": {
-            "primary_key": "id",
-            "write_disposition": "merge",
-        },
-        "resources": [
-            {
-                "name": "meta_campaigns",
-                "endpoint": {
-                    "path": "ads_archive",
-                    "params": {
-                        "search_terms": "Nike",
-                    },
-                    # Meta returns array directly
-                    "data_selector": "$",
-                },
-            }
-        ],
-    }
-
-    yield from rest_api_resources(config)
-
-
-def transform_meta_campaign(item: dict) -> dict:
+    state = dlt.current.resource_state()
+    now = datetime.now(timezone.utc)
+
+    params = {"search_terms": "Nike"}
+    if state.get('last_run'):
+        since = (date.fromisoformat(state['last_run'][:10]) - timedelta(days=lookback_days)).strftime(TIME_FORMAT)
+        if state.get('delivering_since'):
+            since = min(since, state['delivering_since'])
+        params["ad_delivery_start_time_gte"] = since
+
+    response = session_for(base_url).get(f"{base_url}/ads_archive", params=params, stream=stream)
+    response.raise_for_status()
+    ads = iter_response_items(response) if stream else response.json()
+
+    # Earliest start of the ads still delivering: the next run re-reads from there
+    delivering_since = None
+    for batch in batched(ads):
+        for ad in batch:
+            if ad_delivering(ad, now):
+                start_time = ad.get("ad_delivery_start_time") or EARLIEST_TIME
+                delivering_since = min(delivering_since or start_time, start_time)
+        yield batch
+
+    state['delivering_since'] = delivering_since
+    # A day, like google_campaigns: an unchanged state commits no new load
+    state['last_run'] = now.date().isoformat()
+
+
+@dlt.source
+def meta_ads_source(
+    base_url: str = "http://localhost:3001",
+    stream: bool = False,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS
+):
     """
-    Transform Meta Ad Library response to unified campaign format
+    Source for Meta Ad Library API
+
+    Incremental: a refresh requests the ads that started since the
+    previous run (minus lookback_days) plus every ad still delivering, so
+    running ads keep their spend and impressions up to date (see
+    meta_campaigns).
 
     Args:
-        item: Raw Meta ad item
+        base_url: Base URL for the Meta Ad Library mock server
+        stream: Decode responses incrementally (json_stream) instead of
+            materializing each body with response.json()
+        lookback_days: Days before the previous run a refresh still re-reads
 
-    Returns:
-        Transformed campaign dict
+    Yields:
+        DLT resources with Meta ad campaign data
     """
-    return {
-        "campaign_id": item["id"],
-        "campaign_name": item.get("ad_creative_bodies", [""])[0][:100],  # Use first 100 chars of creative as name
-        "source": "meta",
-        "channel": ", ".join(item.get("publisher_platforms", [])),
-        "budget": float(item.get("spend", {}).get("upper_bound", 0)),
-        "spend": float(item.get("spend", {}).get("lower_bound", 0)),
-        "start_date": item.get("ad_delivery_start_time"),
-        "end_date": item.get("ad_delivery_stop_time"),
-        "impressions_min": int(item.get("impressions", {}).get("lower_bound", 0)),
-        "impressions_max": int(item.get("impressions", {}).get("upper_bound", 0)),
-        "currency": item.get("currency", "USD"),
-        "raw_data": item,  # Store full response for reference
-    }
+    yield meta_campaigns(base_url=base_url, stream=stream, lookback_days=lookback_days)
 
 
 if __name__ == "__main__":
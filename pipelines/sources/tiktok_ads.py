@@ -3,24 +3,145 @@ TikTok Ads API Source
 Extracts Nike campaign data from TikTok Ads API mock
 """
 
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
 import dlt
 from dlt.sources.rest_api import RESTAPIConfig, rest_api_resources
 
+from date_windows import DEFAULT_WINDOW_DAYS, DEFAULT_WINDOW_WORKERS, fetch_windows, replace_by_window
+from http_session import session_for
+from json_stream import iter_response_items, streaming_rest_resources
+
+
+def _start_day(campaign: Dict[str, Any]) -> Optional[date]:
+    """UTC day of a campaign's start_time (Unix seconds)"""
+    start_time = campaign.get("start_time")
+    if start_time is None:
+        return None
+    return datetime.fromtimestamp(int(start_time), tz=timezone.utc).date()
+
+
+def _running(campaign: Dict[str, Any]) -> bool:
+    """True while a campaign has no end_time or has not ended yet"""
+    end_time = campaign.get("end_time")
+    return end_time is None or int(end_time) >= datetime.now(timezone.utc).timestamp()
+
+
+@dlt.resource(
+    name="tiktok_campaigns",
+    primary_key="campaign_id",
+    write_disposition="merge"
+)
+def tiktok_campaigns_by_window(
+    base_url: str = "http://localhost:3003",
+    start_date: str = "2025-01-01",
+    end_date: Optional[str] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    max_workers: int = DEFAULT_WINDOW_WORKERS,
+    stream: bool = False,
+    replace_windows: bool = False
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    TikTok Ads campaigns fetched by date window, max_workers windows at a time
+
+    Each window requests the campaigns whose start_time..end_time
+    overlaps it; campaigns returned by several windows are merged on
+    campaign_id. Closed windows are checkpointed (date_windows.fetch_windows),
+    so a re-run only requests the current window, any that failed and any
+    whose campaigns are still running.
+
+    With replace_windows each campaign belongs to the window its
+    start_time falls in, and windows are loaded as partitions (see
+    date_windows).
+
+    Args:
+        base_url: Base URL for the TikTok Ads mock server
+        start_date: First day of the range (YYYY-MM-DD)
+        end_date: Last day of the range (default: today)
+        window_days: Days covered by one request
+        max_workers: Requests in flight at the same time
+        stream: Decode responses incrementally (json_stream)
+        replace_windows: Tag campaigns with their window partition
+
+    Yields:
+        Campaigns, one list per window
+    """
+    session = session_for(base_url)
+
+    def fetch_window(date_from: date, date_to: date) -> List[Dict[str, Any]]:
+        params = {
+            "advertiser_id": "1700000000000001",
+            "start_date": date_from.isoformat(),
+            "end_date": date_to.isoformat(),
+        }
+        response = session.get(f"{base_url}/open_api/v1.3/campaign/get/", params=params, stream=stream)
+        response.raise_for_status()
+        if stream:
+            return list(iter_response_items(response, "data.campaigns"))
+        return response.json().get("data", {}).get("campaigns", [])
+
+    yield from fetch_windows(
+        fetch_window,
+        start_date,
+        end_date,
+        window_days=window_days,
+        max_workers=max_workers,
+        primary_key="campaign_id",
+        partition_day=_start_day if replace_windows else None,
+        is_open=_running
+    )
+
 
 @dlt.source
-def tiktok_ads_source(base_url: str = "http://localhost:3003"):
+def tiktok_ads_source(
+    base_url: str = "http://localhost:3003",
+    stream: bool = False,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    max_workers: int = DEFAULT_WINDOW_WORKERS,
+    replace_windows: bool = False
+):
     """
     Source for TikTok Ads API
 
+    Incremental: only campaigns modified at or after the latest
+    modify_time (Unix seconds) already loaded are requested.
+
     Args:
         base_url: Base URL for the TikTok Ads mock server
+        stream: Decode responses incrementally (json_stream) instead of
+            materializing each body with response.json()
+        start_date: Backfill / refresh by date window from this day
+            (YYYY-MM-DD) instead of the incremental cursor
+        end_date: Last day of the windowed range (default: today)
+        window_days: Days covered by one windowed request
+        max_workers: Windowed requests in flight at the same time
+        replace_windows: Load the windowed range by replacing whole
+            windows instead of merging campaign by campaign
 
     Yields:
         DLT resources with TikTok Ads campaign data
     """
+    if start_date:
+        resource = tiktok_campaigns_by_window(
+            base_url=base_url,
+            start_date=start_date,
+            end_date=end_date,
+            window_days=window_days,
+            max_workers=max_workers,
+            stream=stream,
+            replace_windows=replace_windows
+        )
+        yield replace_by_window(resource) if replace_windows else resource
+        return
+
     config: RESTAPIConfig = {
         "client": {
             "base_url": base_url,
+            # Pooled keep-alive session shared with every request to this host
+            "session": session_for(base_url),
         },
         "resource_defaults": {
             "primary_key": "campaign_id",
@@ -33,6 +154,11 @@ def tiktok_ads_source(base_url: str = "http://localhost:3003"):
                     "path": "open_api/v1.3/campaign/get/",
                     "params": {
                         "advertiser_id": "1700000000000001",  # Nike advertiser ID
+                        "modified_since": {
+                            "type": "incremental",
+                            "cursor_path": "modify_time",
+                            "initial_value": 0,
+                        },
                     },
                     # TikTok returns {data: {campaigns: [...]}}
                     "data_selector": "data.campaigns",
@@ -41,39 +167,7 @@ def tiktok_ads_source(base_url: str = "http://localhost:3003"):
         ],
     }
 
-    yield from rest_api_resources(config)
-
-
-def transform_tiktok_campaign(item: dict) -> dict:
-    """
-    Transform TikTok Ads response to unified campaign format
-
-    Args:
-        item: Raw TikTok Ads campaign item
-
-    Returns:
-        Transformed campaign dict
-    """
-    metrics = item.get("metrics", {})
-
-    return {
-        "campaign_id": item["campaign_id"],
-        "campaign_name": item.get("campaign_name", ""),
-        "source": "tiktok",
-        "channel": item.get("channel", "TikTok"),
-        "budget": float(item.get("budget", 0)),
-        "spend": float(metrics.get("spend", 0)),
-        "start_date": None,  # TikTok uses Unix timestamps - would need conversion
-        "end_date": None,
-        "impressions_min": int(metrics.get("impressions", 0)),
-        "impressions_max": int(metrics.get("impressions", 0)),
-        "clicks": int(metrics.get("clicks", 0)),
-        "conversions": int(metrics.get("conversions", 0)),
-        "conversion_rate": float(metrics.get("conversion_rate", 0)),
-        "cpc": float(metrics.get("cpc", 0)),
-        "currency": "USD",
-        "raw_data": item,
-    }
+    yield from streaming_rest_resources(config) if stream else rest_api_resources(config)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,342 @@
+"""
+Unified Campaigns Table
+
+Maintains marketing_data.unified_campaigns: one normalized row per campaign
+from every source, with budgets and spend in USD, numeric metrics, typed
+TIMESTAMP dates and BIGINT impressions.
+
+This is the only place the raw tables are normalized. Each source's mapping
+is one DuckDB SELECT (micros -> dollars for Google, string metrics -> numbers
+and Unix seconds -> TIMESTAMP for TikTok, spend bounds -> budget for Meta,
+CZK -> USD for Seznam), run set-based over a whole load right after it
+commits, never per row in Python and never per query.
+
+Each source owns a partition of the table (the `source` column). A refresh
+only normalizes the raw rows loaded since the partition was last refreshed
+(their _dlt_load_id is newer than the partition's load_id), replacing the
+unified rows they update. A full reload, or a partition with nothing in it
+yet, is rewritten as a whole. Sources loaded by replacing date window
+partitions (date_windows.replace_by_window) can also drop raw rows, so
+their refresh prunes the unified rows whose raw row is gone.
+"""
+
+from typing import Dict, List, Tuple
+
+from freshness import record_source_refresh
+
+UNIFIED_TABLE = "unified_campaigns"
+
+# CZK -> USD conversion used for Seznam budgets (~25 CZK/USD)
+CZK_PER_USD = 25.0
+
+# (column, type) of unified_campaigns; new columns go at the end so tables
+# created by older versions can be migrated with ALTER TABLE ADD COLUMN
+UNIFIED_SCHEMA: List[Tuple[str, str]] = [
+    ('campaign_id', 'VARCHAR'),
+    ('campaign_name', 'VARCHAR'),
+    ('source', 'VARCHAR'),
+    ('channel', 'VARCHAR'),
+    ('budget', 'DOUBLE'),
+    ('impressions', 'BIGINT'),
+    ('start_date', 'TIMESTAMP'),
+    ('end_date', 'TIMESTAMP'),
+    ('spend', 'DOUBLE'),
+    ('clicks', 'BIGINT'),
+    ('conversions', 'DOUBLE'),
+    ('currency', 'VARCHAR'),
+    # dlt load that wrote the raw row
+    ('load_id', 'VARCHAR'),
+]
+
+UNIFIED_COLUMNS = ",\n".join(f"    {name} {column_type}" for name, column_type in UNIFIED_SCHEMA)
+
+# Per-source partition: source name -> (raw dlt table, normalizing SELECT)
+# Column order must match UNIFIED_SCHEMA. {where} restricts the SELECT to
+# the rows of the loads being normalized.
+SOURCE_PARTITIONS: Dict[str, Tuple[str, str]] = {
+    'meta': ('meta_campaigns', """
+        SELECT
+            CAST(id AS VARCHAR),
+            page_name,
+            'meta',
+            'Facebook/Instagram',
+            TRY_CAST(spend__upper_bound AS DOUBLE),
+            TRY_CAST(impressions__upper_bound AS BIGINT),
+            TRY_CAST(ad_delivery_start_time AS TIMESTAMP),
+            TRY_CAST(ad_delivery_stop_time AS TIMESTAMP),
+            TRY_CAST(spend__lower_bound AS DOUBLE),
+            NULL,
+            NULL,
+            COALESCE(currency, 'USD'),
+            _dlt_load_id
+        FROM {dataset}.meta_campaigns
+        {where}
+    """),
+    'google': ('google_campaigns', """
+        SELECT
+            CAST(id AS VARCHAR),
+            name,
+            'google',
+            channel,
+            budget_micros / 1000000.0,
+            TRY_CAST(metrics__impressions AS BIGINT),
+            TRY_CAST(start_date AS TIMESTAMP),
+            TRY_CAST(end_date AS TIMESTAMP),
+            metrics__cost_micros / 1000000.0,
+            TRY_CAST(metrics__clicks AS BIGINT),
+            TRY_CAST(metrics__conversions AS DOUBLE),
+            'USD',
+            _dlt_load_id
+        FROM {dataset}.google_campaigns
+        {where}
+    """),
+    'tiktok': ('tiktok_campaigns', """
+        SELECT
+            CAST(campaign_id AS VARCHAR),
+            campaign_name,
+            'tiktok',
+            'TikTok',
+            TRY_CAST(budget AS DOUBLE),
+            COALESCE(TRY_CAST(metrics__impressions AS BIGINT), 0),
+            CAST(to_timestamp(TRY_CAST(start_time AS BIGINT)) AS TIMESTAMP),
+            CAST(to_timestamp(TRY_CAST(end_time AS BIGINT)) AS TIMESTAMP),
+            TRY_CAST(metrics__spend AS DOUBLE),
+            TRY_CAST(metrics__clicks AS BIGINT),
+            TRY_CAST(metrics__conversions AS DOUBLE),
+            'USD',
+            _dlt_load_id
+        FROM {dataset}.tiktok_campaigns
+        {where}
+    """),
+    'seznam': ('seznam_campaigns', """
+        SELECT
+            CAST(campaign_id AS VARCHAR),
+            name,
+            'seznam',
+            channel,
+            budget_czk / {czk_per_usd},
+            COALESCE(TRY_CAST(total_impressions AS BIGINT), 0),
+            TRY_CAST(created AS TIMESTAMP),
+            TRY_CAST(updated AS TIMESTAMP),
+            total_spend / {czk_per_usd},
+            TRY_CAST(total_clicks AS BIGINT),
+            TRY_CAST(conversions AS DOUBLE),
+            'USD',
+            _dlt_load_id
+        FROM {dataset}.seznam_campaigns
+        {where}
+    """),
+    'soap': ('budget_approvals', """
+        SELECT
+            CAST(approval_id AS VARCHAR),
+            campaign_name,
+            'soap',
+            'Budget System',
+            TRY_CAST(approved_amount AS DOUBLE),
+            0,
+            TRY_CAST(approval_date AS TIMESTAMP),
+            NULL,
+            NULL,
+            NULL,
+            NULL,
+            COALESCE(currency, 'USD'),
+            _dlt_load_id
+        FROM {dataset}.budget_approvals
+        {where}
+    """),
+}
+
+# Raw key column each partition's campaign_id is cast from
+PARTITION_KEYS: Dict[str, str] = {
+    'meta': 'id',
+    'google': 'id',
+    'tiktok': 'campaign_id',
+    'seznam': 'campaign_id',
+    'soap': 'approval_id',
+}
+
+# Raw table name -> source partition it feeds
+TABLE_TO_SOURCE = {table: source for source, (table, _) in SOURCE_PARTITIONS.items()}
+
+
+def partition_select_sql(source: str, dataset: str = "marketing_data", since_load_id: str = None) -> str:
+    """
+    Normalizing SELECT for one source partition
+
+    Args:
+        source: Source partition ('meta', 'google', ...)
+        dataset: Dataset holding the raw tables
+        since_load_id: Only raw rows loaded after this load (bound as the
+            statement's single ? parameter); all rows when None
+    """
+    _, select_sql = SOURCE_PARTITIONS[source]
+    where = "WHERE _dlt_load_id > ?" if since_load_id else ""
+    return select_sql.format(dataset=dataset, czk_per_usd=CZK_PER_USD, where=where)
+
+
+def _ensure_unified_table(client, unified: str) -> bool:
+    """
+    Create unified_campaigns, or add the columns an older version lacked
+
+    Returns:
+        True if existing rows are missing columns and must be rebuilt
+    """
+    client.execute_sql(f"CREATE TABLE IF NOT EXISTS {unified} ({UNIFIED_COLUMNS})")
+    dataset, table = unified.split(".")
+    existing = {
+        row[0] for row in client.execute_sql(
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = ? AND table_name = ?
+            """,
+            dataset,
+            table,
+        )
+    }
+    missing = [(name, column_type) for name, column_type in UNIFIED_SCHEMA if name not in existing]
+    for name, column_type in missing:
+        client.execute_sql(f"ALTER TABLE {unified} ADD COLUMN {name} {column_type}")
+    return bool(missing)
+
+
+def _raw_table_exists(client, dataset: str, raw_table: str) -> bool:
+    return client.execute_sql(
+        """
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = ? AND table_name = ?
+        """,
+        dataset,
+        raw_table,
+    )[0][0] > 0
+
+
+def _insert_columns() -> str:
+    return ", ".join(name for name, _ in UNIFIED_SCHEMA)
+
+
+def _rewrite_partition(client, dataset: str, unified: str, source: str):
+    """Replace a source's whole partition with its normalized raw table"""
+    raw_table, _ = SOURCE_PARTITIONS[source]
+    client.execute_sql(f"DELETE FROM {unified} WHERE source = ?", source)
+    if _raw_table_exists(client, dataset, raw_table):
+        client.execute_sql(
+            f"INSERT INTO {unified} ({_insert_columns()}) {partition_select_sql(source, dataset)}"
+        )
+
+
+def _apply_new_loads(client, dataset: str, unified: str, source: str, since_load_id: str):
+    """Normalize the raw rows loaded after since_load_id into the partition"""
+    raw_table, _ = SOURCE_PARTITIONS[source]
+    # Merged rows carry the load that last wrote them: drop their old
+    # unified version, then insert the new one
+    client.execute_sql(
+        f"""
+        DELETE FROM {unified}
+        WHERE source = ? AND campaign_id IN (
+            SELECT CAST({PARTITION_KEYS[source]} AS VARCHAR)
+            FROM {dataset}.{raw_table}
+            WHERE _dlt_load_id > ?
+        )
+        """,
+        source,
+        since_load_id,
+    )
+    client.execute_sql(
+        f"INSERT INTO {unified} ({_insert_columns()}) "
+        f"{partition_select_sql(source, dataset, since_load_id)}",
+        since_load_id,
+    )
+
+
+def _prune_partition(client, dataset: str, unified: str, source: str):
+    """Delete the partition's rows whose raw row no longer exists"""
+    raw_table, _ = SOURCE_PARTITIONS[source]
+    client.execute_sql(
+        f"""
+        DELETE FROM {unified}
+        WHERE source = ? AND NOT EXISTS (
+            SELECT 1 FROM {dataset}.{raw_table} raw
+            WHERE CAST(raw.{PARTITION_KEYS[source]} AS VARCHAR) = {unified}.campaign_id
+        )
+        """,
+        source,
+    )
+
+
+def refresh_unified_partition(
+    pipeline,
+    source: str,
+    load_info=None,
+    full: bool = False,
+    prune: bool = False,
+    complete: bool = True
+) -> int:
+    """
+    Bring the unified_campaigns partition of one source up to date
+
+    Runs after the source's pipeline.run, in a single transaction, so
+    readers never see a half-written partition. Only the raw rows of loads
+    newer than the partition are normalized; other sources' rows are left
+    untouched. The source's entry in the freshness catalog is updated in
+    the same transaction.
+
+    Args:
+        pipeline: dlt pipeline whose destination holds the raw tables
+        source: Source partition to refresh ('meta', 'google', ...)
+        load_info: LoadInfo returned by the source's pipeline.run, if any
+        full: Rewrite the whole partition (after a full reload, rows that
+            are gone from the raw table must go too)
+        prune: Also drop rows whose raw row was deleted by the load (window
+            partitions replaced)
+        complete: False when the load is partial: the partition is
+            refreshed but the source is not marked fresh
+
+    Returns:
+        Number of rows now in the partition
+    """
+    raw_table, _ = SOURCE_PARTITIONS[source]
+    load_id = load_info.loads_ids[-1] if load_info and load_info.loads_ids else None
+
+    with pipeline.sql_client() as client:
+        dataset = client.dataset_name
+        unified = f"{dataset}.{UNIFIED_TABLE}"
+
+        with client.begin_transaction():
+            if _ensure_unified_table(client, unified):
+                # Rows written before the new columns existed: renormalize
+                # every partition, not just this one
+                for partition in SOURCE_PARTITIONS:
+                    _rewrite_partition(client, dataset, unified, partition)
+            else:
+                since_load_id = None if full else client.execute_sql(
+                    f"SELECT MAX(load_id) FROM {unified} WHERE source = ?", source
+                )[0][0]
+                if since_load_id and _raw_table_exists(client, dataset, raw_table):
+                    _apply_new_loads(client, dataset, unified, source, since_load_id)
+                    if prune:
+                        _prune_partition(client, dataset, unified, source)
+                else:
+                    _rewrite_partition(client, dataset, unified, source)
+
+            row_count = client.execute_sql(
+                f"SELECT COUNT(*) FROM {unified} WHERE source = ?", source
+            )[0][0]
+            record_source_refresh(client, source, load_id, row_count, complete=complete)
+
+        return row_count
+
+
+def refresh_unified_campaigns(pipeline, sources: List[str] = None, full: bool = False) -> Dict[str, int]:
+    """
+    Bring the unified_campaigns partitions of several sources up to date
+
+    Args:
+        pipeline: dlt pipeline whose destination holds the raw tables
+        sources: Sources to refresh (default: all)
+        full: Rewrite the partitions as a whole
+
+    Returns:
+        Dict mapping source name to partition row count
+    """
+    sources = sources or list(SOURCE_PARTITIONS)
+    return {source: refresh_unified_partition(pipeline, source, full=full) for source in sources}
@@ -32,6 +32,12 @@ export interface StatusResponse {
 		status: 'running' | 'offline' | 'error';
 	}[];
 	ready: boolean;
+	throughput?: {
+		lastRun: string | null;
+		durationSeconds: number | null;
+		sources: Record<string, { status: string; rows: number; rows_per_second: number | null }>;
+		regressions: { source: string; rows_per_second: number; baseline_rows_per_second: number }[];
+	};
 	error?: string;
 	timestamp: string;
 }